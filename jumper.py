@@ -3,8 +3,18 @@ import pygame_gui
 import sys
 import os
 import csv, json
+import sqlite3, threading, queue, atexit, struct
+import multiprocessing
+import gc, weakref, tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
 from datetime import datetime
-from random import randrange, getrandbits, uniform
+from random import Random, randrange, uniform
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 WIDTH, HEIGHT = 1000, 500
 GRAVITY = 300
@@ -18,48 +28,686 @@ PLAYER_DIE_VOLUME = 1.5
 ENEMY_LANDING_VOLUME = 0.5
 ENEMY_DIE_VOLUME = 0.6
 BOOM_VOLUME = 0.4
+MUSIC_FADE = 0.5
+MP3_BITRATES = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0)
+MP3_RATES = (44100, 48000, 32000, 0)
+ENEMY_VOICES = 3
+BOOM_VOICES = 2
+FREE_VOICES = 8
+
+MAX_ENEMIES_PER_PLATFORM = 2
+BOMB_CHANCE = 20
+PLAYER_START = 50, 300
+PLAYER_JUMP_SPEED = 300
+PUSH_SPEED = 500
+PUSH_DIST = 80
+CAMERA_LIMIT = 600
+START_PLATFORM = 30, 100, 500
+PLATFORM_GAP = 150, 300
+PLATFORM_HEIGHT = 45, 110
+PLATFORM_LENGTH = 150, 500
+ENEMY_JUMP_SPEED = 200, 350
+LANDING_TOLERANCE = 10
+BOMB_RADIUS = 200
+PLAYER_JUMP_DELAY = 0.15
+ENEMY_JUMP_DELAY = 0.1
+LANDING_DELAY = 0.01
+FUSE_DELAY = 0.3
+GRID_CELL = 128
+GRID_PADDING = 32
+ACTIVE_MARGIN = 100
+CULL_MARGIN = 50
+OFFSCREEN_UPDATE_INTERVAL = 1
+PHYSICS_STEP = 1 / 120
+MAX_PHYSICS_STEPS = 8
+FPS_LIMIT = 120
 
 GOD_MODE = 0
+HEADLESS = "--headless" in sys.argv or bool(os.environ.get("JUMPER_HEADLESS"))
+HEADLESS_FRAMES = 10000
+HEADLESS_STEP = PHYSICS_STEP
+BATCH_PLATFORMS = 8
+BATCH_GENERATE_EVERY = 8
+ENV_PLATFORMS = 3
+ENV_ENEMIES = 4
+ENV_BOMBS = 2
+ENV_COLORS = "black", "gray", "red", "white", "purple"
 SHOW_FPS_IN_GAME = 1
+CHECK_ALLOCATIONS = 0
+DIRTY_RENDERING = 0
+
+RECORDS_SHOWN = 5
+RECORDS_TIME_FORMAT = "%d.%m.%Y %H:%M:%S"
+
+RECORD_REPLAYS = 1
+REPLAYS_DIR = "replays"
+REPLAY_HEADER = struct.Struct("<4sQdII")
+REPLAY_MAGIC = b"JRP1"
+
+CACHE_DIR = "cache"
+CACHE_HEADER = struct.Struct("<dHHHH")
+SHOW_STARTUP_TIME = 1
+
+ATLAS_IMAGE = "atlas.png"
+ATLAS_INDEX = "atlas.json"
+ATLAS_WIDTH = 512
+ATLAS_SHEETS = (("player_jump", 6, 1), ("player_landing", 6, 1), ("player_die", 15, 1),
+                ("enemy_jump", 13, 1), ("enemy_landing", 5, 1), ("enemy_die", 15, 1),
+                ("fire", 7, 1), ("boom", 6, 1))
+
+cache_stats = {"hits": 0, "misses": 0}
 
 
 def load_image(name, size=None, colorkey=None):
     fullname = os.path.join('data', name)
     if not os.path.isfile(fullname):
-        print(f"Файл с изображением '{fullname}' не найден")
-        sys.exit()
-    image = pygame.image.load(fullname)
+        raise FileNotFoundError(f"Файл с изображением '{fullname}' не найден")
+    image = load_cached(fullname, size)
+    if not image:
+        image = pygame.image.load(fullname).convert_alpha()
+        if size:
+            prev_w, prev_h = image.get_size()
+            if abs(size[0] / prev_w) > abs(size[1] / prev_h):
+                image = pygame.transform.smoothscale(image, (size[0], prev_h * size[0] // prev_w))
+            else:
+                image = pygame.transform.smoothscale(image,
+                                                     (prev_w * size[1] // prev_h,
+                                                      size[1]))
+        save_cached(fullname, size, image)
     if colorkey is not None:
         image = image.convert()
         if colorkey == -1:
             colorkey = image.get_at((0, 0))
         image.set_colorkey(colorkey)
-    else:
-        image = image.convert_alpha()
-    if size:
-        prev_w, prev_h = image.get_size()
-        if abs(size[0] / prev_w) > abs(size[1] / prev_h):
-            image = pygame.transform.smoothscale(image, (size[0], prev_h * size[0] // prev_w))
-        else:
-            image = pygame.transform.smoothscale(image,
-                                                 (prev_w * size[1] // prev_h,
-                                                  size[1]))
     return image
 
 
+def save_replay(filename, seed, time, frames, pushes):
+    data = bytearray(REPLAY_HEADER.pack(REPLAY_MAGIC, seed, time, frames, len(pushes)))
+    prev = 0
+    for frame in pushes:
+        delta, prev = frame - prev, frame
+        while delta >= 0x80:
+            data.append(delta & 0x7F | 0x80)
+            delta >>= 7
+        data.append(delta)
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    open(filename, "wb").write(data)
+
+
+def load_replay(filename):
+    data = open(filename, "rb").read()
+    magic, seed, time, frames, count = REPLAY_HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC:
+        raise ValueError(f"'{filename}' is not a replay file")
+    pushes = []
+    frame = shift = delta = 0
+    for byte in data[REPLAY_HEADER.size:]:
+        delta |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            frame += delta
+            pushes.append(frame)
+            shift = delta = 0
+    return seed, time, frames, pushes[:count]
+
+
+def cached_name(fullname, size):
+    w, h = size or (0, 0)
+    return os.path.join(CACHE_DIR, f"{os.path.basename(fullname)}.{w}x{h}.raw")
+
+
+def load_cached(fullname, size):
+    cachename = cached_name(fullname, size)
+    if os.path.isfile(cachename):
+        try:
+            data = open(cachename, "rb").read()
+            mtime, target_w, target_h, w, h = CACHE_HEADER.unpack_from(data)
+            if (mtime == os.path.getmtime(fullname) and
+                    (target_w, target_h) == tuple(size or (0, 0))):
+                image = pygame.image.frombuffer(data[CACHE_HEADER.size:], (w, h),
+                                                "RGBA").convert_alpha()
+                cache_stats["hits"] += 1
+                return image
+        except (OSError, struct.error, ValueError):
+            pass
+    cache_stats["misses"] += 1
+
+
+def write_replacing(filename, write):
+    folder = os.path.dirname(filename) or "."
+    os.makedirs(folder, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            write(file)
+        os.replace(temp, filename)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+def save_cached(fullname, size, image):
+    cachename = cached_name(fullname, size)
+
+    def write(file):
+        file.write(CACHE_HEADER.pack(os.path.getmtime(fullname),
+                                     *(size or (0, 0)), *image.get_size()))
+        file.write(pygame.image.tobytes(image, "RGBA"))
+
+    try:
+        write_replacing(cachename, write)
+    except OSError as error:
+        print(f"Не удалось сохранить кэш '{cachename}': {error}")
+
+
 def load_sound(name):
     fullname = os.path.join('data', name)
     if not os.path.isfile(fullname):
-        print(f"Файл звука '{fullname}' не найден")
-        sys.exit()
-    return pygame.mixer.Sound(fullname)
+        raise FileNotFoundError(f"Файл звука '{fullname}' не найден")
+    if pygame.mixer.get_init():
+        return pygame.mixer.Sound(fullname)
+
+
+def load_music(name, resume=False):
+    fullname = os.path.join('data', name)
+    if not os.path.isfile(fullname):
+        raise FileNotFoundError(f"Файл музыки '{fullname}' не найден")
+    return Track(music_player, fullname, resume)
+
+
+def mp3_length(filename):
+    with open(filename, "rb") as file:
+        data = file.read(10)
+        start = 0
+        if data[:3] == b"ID3":
+            start = 10 + sum((byte & 0x7F) << 7 * (3 - i) for i, byte in enumerate(data[6:10]))
+        file.seek(start)
+        data = file.read(64)
+        file.seek(-128, os.SEEK_END)
+        end = file.tell() if file.read(3) == b"TAG" else file.tell() + 128
+    header = int.from_bytes(data[:4], "big")
+    if header >> 17 != 0x7FFD:
+        return None
+    bitrate, rate = MP3_BITRATES[header >> 12 & 15], MP3_RATES[header >> 10 & 3]
+    if not bitrate or not rate:
+        return None
+    for tag in b"Xing", b"Info":
+        i = data.find(tag)
+        if i >= 0 and data[i + 7] & 1:
+            return int.from_bytes(data[i + 8:i + 12], "big") * 1152 / rate
+    return (end - start) * 8 / (bitrate * 1000)
+
+
+def load_effect(sound, volume, count=1):
+    effect = voices.add(assets.get(sound), count)
+    volume_bus.add("effects", effect, volume)
+    return effect
+
+
+class Assets:
+    def __init__(self):
+        self.loaders = {}
+        self.values = {}
+        self.errors = {}
+        self.lock = threading.RLock()
+
+    def add(self, name, loader, *args):
+        self.loaders[name] = loader, args
+
+    def get(self, name):
+        if name not in self.values:
+            self.load(name)
+        return self.values[name]
+
+    def ready(self, *names):
+        return all(name in self.values for name in names)
+
+    def load(self, name):
+        with self.lock:
+            if name in self.errors:
+                raise self.errors[name]
+            if name not in self.values:
+                loader, args = self.loaders[name]
+                try:
+                    self.values[name] = loader(*args)
+                except BaseException as error:
+                    self.errors[name] = error
+                    raise
+
+    def load_async(self, *names, done=None):
+        threading.Thread(target=self.preload, args=names, kwargs={"done": done},
+                         daemon=True).start()
+
+    def preload(self, *names, done=None):
+        for name in names:
+            try:
+                self.load(name)
+            except BaseException:
+                pass
+        if done:
+            done()
+
+
+class Track:
+    def __init__(self, player, filename, resume=False):
+        self.player = player
+        self.filename = filename
+        self.resume = resume
+        self.volume = 1
+        self.length = mp3_length(filename)
+
+    def set_volume(self, volume):
+        self.volume = volume
+        if self.player.current is self and not self.player.fading:
+            pygame.mixer.music.set_volume(volume)
+
+
+class MusicPlayer:
+    def __init__(self, fade=MUSIC_FADE):
+        self.fade = fade
+        self.fading = 0
+        self.current = None
+        self.target = None
+        self.start = 0
+        self.positions = {}
+
+    def play(self, track):
+        if track is self.target or not pygame.mixer.get_init():
+            return
+        self.target = track
+        if track is self.current:
+            self.fading = 0
+            pygame.mixer.music.set_volume(track.volume)
+        elif self.current and pygame.mixer.music.get_busy():
+            self.fading = self.fade
+        else:
+            self.switch()
+
+    def stop(self):
+        self.play(None)
+
+    def update(self, time):
+        if self.fading > 0:
+            self.fading -= time
+            if self.fading > 0:
+                pygame.mixer.music.set_volume(self.current.volume * self.fading / self.fade)
+            else:
+                self.switch()
+
+    def switch(self):
+        self.fading = 0
+        if self.current:
+            self.positions[self.current] = self.position()
+        self.current = track = self.target
+        if not track:
+            pygame.mixer.music.stop()
+            return
+        self.start = self.positions.get(track, 0) if track.resume else 0
+        pygame.mixer.music.load(track.filename)
+        pygame.mixer.music.set_volume(track.volume)
+        pygame.mixer.music.play(-1, self.start, int(self.fade * 1000))
+
+    def position(self):
+        position = self.start + max(pygame.mixer.music.get_pos(), 0) / 1000
+        if self.current and self.current.length:
+            position %= self.current.length
+        return position
+
+
+class Effect:
+    def __init__(self, manager, sound, channels):
+        self.manager = manager
+        self.sound = sound
+        self.channels = channels
+        self.volume = 1
+        self.turn = 0
+        self.frame = None
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+    def play(self):
+        if not self.channels or self.frame == self.manager.frame:
+            return
+        self.frame = self.manager.frame
+        for channel in self.channels:
+            if not channel.get_busy():
+                break
+        else:
+            channel = self.channels[self.turn]
+            self.turn = (self.turn + 1) % len(self.channels)
+        channel.set_volume(self.volume)
+        channel.play(self.sound)
+
+
+class VoiceManager:
+    def __init__(self, free=FREE_VOICES):
+        self.free = free
+        self.reserved = 0
+        self.frame = 0
+
+    def add(self, sound, voices=1):
+        if not pygame.mixer.get_init():
+            return Effect(self, sound, [])
+        first = self.reserved
+        self.reserved += voices
+        pygame.mixer.set_num_channels(self.reserved + self.free)
+        pygame.mixer.set_reserved(self.reserved)
+        return Effect(self, sound, [pygame.mixer.Channel(i)
+                                    for i in range(first, self.reserved)])
+
+    def update(self):
+        self.frame += 1
+
+
+class VolumeBus:
+    def __init__(self):
+        self.sounds = {}
+        self.gains = {}
+        self.lock = threading.Lock()
+
+    def add(self, category, sound, volume):
+        with self.lock:
+            self.sounds.setdefault(category, []).append((sound, volume))
+            sound.set_volume(volume * self.gains.get(category, 1))
+
+    def set_gain(self, category, gain):
+        with self.lock:
+            if self.gains.get(category) == gain:
+                return
+            self.gains[category] = gain
+            for sound, volume in self.sounds.get(category, ()):
+                sound.set_volume(volume * gain)
+
+
+class CountedSurfaceType(type):
+    def __instancecheck__(cls, obj):
+        return isinstance(obj, pygame.SurfaceType)
+
+
+class CountedSurface(pygame.SurfaceType, metaclass=CountedSurfaceType):
+    counters = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for counter in self.counters:
+            counter.created.add(self)
+            counter.count += 1
+
+
+class SurfaceCounter:
+    targets = ((pygame.transform, "flip"),
+               (pygame.transform, "scale"),
+               (pygame.transform, "smoothscale"),
+               (pygame.transform, "rotate"),
+               (pygame.transform, "rotozoom"),
+               (pygame.image, "load"),
+               (pygame.image, "frombuffer"),
+               (pygame.image, "frombytes"))
+
+    def __init__(self):
+        self.count = 0
+        self.originals = []
+        self.created = weakref.WeakSet()
+        self.before = None
+
+    def __enter__(self):
+        self.before = self.live()
+        for module, name in self.targets:
+            func = getattr(module, name)
+            self.originals.append((module, name, func))
+            setattr(module, name, self.counted(func))
+        self.originals.append((pygame, "Surface", pygame.Surface))
+        pygame.Surface = CountedSurface
+        CountedSurface.counters.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        CountedSurface.counters.remove(self)
+        for module, name, func in reversed(self.originals):
+            setattr(module, name, func)
+        self.originals.clear()
+        self.count += sum(1 for surface in self.live()
+                          if surface not in self.before and surface not in self.created)
+        self.before = None
+
+    def counted(self, func):
+        def wrapper(*args, **kwargs):
+            surface = func(*args, **kwargs)
+            self.created.add(surface)
+            self.count += 1
+            return surface
+        return wrapper
+
+    @staticmethod
+    def live():
+        surfaces = weakref.WeakSet()
+        seen = set()
+        objects = gc.get_objects()
+        while objects:
+            referents = gc.get_referents(*objects)
+            objects = []
+            for obj in referents:
+                if isinstance(obj, pygame.SurfaceType):
+                    surfaces.add(obj)
+                elif (type(obj) in (dict, tuple) and not gc.is_tracked(obj) and
+                      id(obj) not in seen):
+                    seen.add(id(obj))
+                    objects.append(obj)
+        return surfaces
+
+
+frames_cache = {}
+
+
+def build_atlas():
+    x = y = shelf = 0
+    places = []
+    index = {}
+    sheets = [(name, pygame.image.load(os.path.join('data', name + ".png")), columns, rows)
+              for name, columns, rows in ATLAS_SHEETS]
+    sheets.sort(key=lambda sheet: -sheet[1].get_height() // sheet[3])
+    for name, sheet, columns, rows in sheets:
+        w, h = sheet.get_width() // columns, sheet.get_height() // rows
+        index[name] = []
+        for j in range(rows):
+            for i in range(columns):
+                if x + w > ATLAS_WIDTH:
+                    x, y, shelf = 0, y + shelf, 0
+                places.append((sheet.subsurface((w * i, h * j, w, h)), (x, y)))
+                index[name].append((x, y, w, h))
+                x += w
+                shelf = max(shelf, h)
+    atlas = pygame.Surface((ATLAS_WIDTH, y + shelf), pygame.SRCALPHA)
+    for frame, pos in places:
+        atlas.blit(frame, pos, special_flags=pygame.BLEND_RGBA_MAX)
+    write_replacing(os.path.join(CACHE_DIR, ATLAS_IMAGE),
+                    lambda file: pygame.image.save(atlas, file, ATLAS_IMAGE))
+    write_replacing(os.path.join(CACHE_DIR, ATLAS_INDEX),
+                    lambda file: file.write(json.dumps(index).encode()))
+
+
+def load_atlas():
+    image_name = os.path.join(CACHE_DIR, ATLAS_IMAGE)
+    index_name = os.path.join(CACHE_DIR, ATLAS_INDEX)
+    sources = [os.path.join('data', name + ".png") for name, *_ in ATLAS_SHEETS]
+    newest = max([os.path.getmtime(source) for source in sources
+                  if os.path.isfile(source)], default=0)
+    if (not os.path.isfile(image_name) or
+            not os.path.isfile(index_name) or newest > os.path.getmtime(index_name)):
+        build_atlas()
+    atlas = load_cached(image_name, None)
+    if not atlas:
+        atlas = pygame.image.load(image_name).convert_alpha()
+        save_cached(image_name, None, atlas)
+    index = json.loads(open(index_name).read())
+    return {name: tuple(atlas.subsurface(rect) for rect in rects)
+            for name, rects in index.items()}
+
+
+def cut_frames(name):
+    if name not in frames_cache:
+        atlas = assets.get("atlas")
+        frames = atlas[name]
+        flipped = tuple(pygame.transform.flip(frame, 1, 0) for frame in frames)
+        frames_cache[name] = (frames, flipped,
+                              tuple(map(pygame.mask.from_surface, frames)),
+                              tuple(map(pygame.mask.from_surface, flipped)))
+    return frames_cache[name]
+
+
+def load_animations(*sheets):
+    animations = {}, {}
+    masks = {}, {}
+    for name, sheet in sheets:
+        frames, flipped, frame_masks, flipped_masks = cut_frames(sheet)
+        animations[0][name] = frames
+        animations[1][name] = flipped
+        masks[0][name] = frame_masks
+        masks[1][name] = flipped_masks
+    return animations, masks
+
+
+masks_cache = {}
+fonts_cache = {}
+glyphs_cache = {}
+platforms_cache = {}
+
+
+def solid_mask(size):
+    if size not in masks_cache:
+        masks_cache[size] = pygame.mask.Mask(size, fill=True)
+    return masks_cache[size]
+
+
+def get_font(name, size):
+    if (name, size) not in fonts_cache:
+        fonts_cache[name, size] = pygame.font.Font(name, size)
+    return fonts_cache[name, size]
+
+
+def copy_value(value):
+    return value.copy() if isinstance(value, (list, pygame.Rect)) else value
+
+
+def platform_sheet(length, height):
+    sheet = platforms_cache.get("sheet")
+    if not sheet or sheet.get_width() < length or sheet.get_height() < height:
+        w, h = sheet.get_size() if sheet else (0, 0)
+        sheet = pygame.Surface((max(w, length), max(h, height)))
+        sheet.fill("#7A2029")
+        platforms_cache["sheet"] = sheet
+    return sheet
+
+
+class Pool:
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+
+    def acquire(self, *args, **kwargs):
+        if self.free:
+            sprite = self.free.pop()
+            sprite.reset(*args, **kwargs)
+        else:
+            sprite = self.cls(*args, **kwargs)
+            sprite.pool = self
+        return sprite
+
+    def release(self, sprite):
+        self.free.append(sprite)
+
+
+class SpatialGroup(pygame.sprite.Group):
+    def __init__(self, *sprites, cell=GRID_CELL):
+        self.cell = cell
+        self.grid = {}
+        self.cells = {}
+        self.order = {}
+        self.pending = set()
+        self.counter = 0
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite)
+        self.counter += 1
+        self.order[sprite] = self.counter
+        self.pending.add(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.unplace(sprite)
+        self.pending.discard(sprite)
+        del self.order[sprite]
+
+    def place(self, sprite):
+        left, right = sprite.world_span()
+        span = int(left // self.cell), int(right // self.cell)
+        if self.cells.get(sprite) == span:
+            return
+        self.unplace(sprite)
+        for i in range(span[0], span[1] + 1):
+            self.grid.setdefault(i, set()).add(sprite)
+        self.cells[sprite] = span
+
+    def unplace(self, sprite):
+        span = self.cells.pop(sprite, None)
+        if span:
+            for i in range(span[0], span[1] + 1):
+                cell = self.grid[i]
+                cell.discard(sprite)
+                if not cell:
+                    del self.grid[i]
+
+    def move(self, sprite):
+        if sprite in self.order:
+            self.pending.discard(sprite)
+            self.place(sprite)
+
+    def query(self, left, right):
+        while self.pending:
+            self.place(self.pending.pop())
+        first = int((left - GRID_PADDING) // self.cell)
+        last = int((right + GRID_PADDING) // self.cell)
+        if first == last:
+            return self.grid.get(first, ())
+        found = set()
+        for i in range(first, last + 1):
+            if i in self.grid:
+                found.update(self.grid[i])
+        return found
+
+    def visible(self, left, right):
+        sprites = []
+        for sprite in self.query(left, right):
+            sprite_left, sprite_right = sprite.world_span()
+            if sprite_left < right and sprite_right > left:
+                sprites.append(sprite)
+        sprites.sort(key=self.order.__getitem__)
+        return sprites
+
+    def collideany(self, sprite):
+        rect = sprite.rect
+        order = self.order
+        hit = None
+        for other in self.query(*sprite.world_span()):
+            if (rect.colliderect(other.rect) and
+                    (hit is None or order[other] < order[hit])):
+                hit = other
+        return hit
 
 
 class Camera:
-    def __init__(self, target=None, limit=500):
+    def __init__(self, target=None, limit=500, width=WIDTH):
         self.x = 0
+        self.width = width
         self.set_target(target, limit)
 
+    def viewport(self, margin=0):
+        return -self.x - margin, -self.x + self.width + margin
+
     def apply(self, group, k=1):
         for sprite in group:
             if sprite != self.target:
@@ -83,26 +731,52 @@ class Camera:
             self.x = x
 
 
+class Parallax:
+    def __init__(self, size, *layers, overlap=5):
+        self.width, self.height = size
+        self.layers = []
+        for image, k in layers:
+            w, h = image.get_size()
+            period = w - overlap
+            opaque = pygame.mask.from_surface(image, 254).count() == w * h
+            strip = pygame.Surface((period * (self.width // period + 1) + w, h),
+                                   pygame.SRCALPHA)
+            for x in range(0, strip.get_width() - overlap, period):
+                strip.blit(image, (x, 0))
+            strip = strip.convert() if opaque else strip.convert_alpha()
+            self.layers.append((strip, period, k))
+
+    def draw(self, surface, x):
+        for strip, period, k in self.layers:
+            surface.blit(strip, (int(x * k) % period - period,
+                                 self.height - strip.get_height()))
+
+
 class Sprite(pygame.sprite.Sprite):
-    def __init__(self, pos, *groups, randflip=False):
-        super().__init__(*groups)
+    def __init__(self):
+        super().__init__()
+        self.pool = None
+        self.frames = {}
+        self.masks = {}
+        self.area = None
+
+    def reset(self, pos, *groups, randflip=False):
+        self.add(*groups)
 
         self.death = False
 
-        self.frames = {}
         self.cur_frame = 0
         self.anim_name = None
         self.anim_delay = 0
         self.anim_phase = 0
-        self.flipped = getrandbits(1) if randflip else 0
+        self.flipped = game.rng.getrandbits(1) if randflip else 0
         self.prev_name = None
 
         self.start_pos = list(pos)
         self.camera_delta = game.camera.x
+        self.prev_pos = None
 
     def update(self, time):
-        if self.rect.right < -game.width:
-            self.destruct()
         if self.rect.top > game.height:
             self.kill()
 
@@ -111,25 +785,17 @@ class Sprite(pygame.sprite.Sprite):
             self.anim_phase = 0
             if self.cur_frame + 1 < len(self.frames[self.anim_name]):
                 self.cur_frame += 1
-                self.image = pygame.transform.flip(
-                    self.frames[self.anim_name][self.cur_frame],
-                    self.flipped, 0)
+                self.set_frame(self.anim_name, self.cur_frame)
                 new_pos = self.rect.midbottom
-                self.rect = self.image.get_rect()
+                self.rect.size = self.image.get_size()
                 self.rect.midbottom = new_pos
             else:
                 self.prev_name = self.anim_name
                 self.anim_name = None
 
-    def cut_sheet(self, sheet, name, columns, rows):
-        self.rect = pygame.Rect(0, 0, sheet.get_width() // columns,
-                                sheet.get_height() // rows)
-        for j in range(rows):
-            for i in range(columns):
-                frame_location = (self.rect.w * i, self.rect.h * j)
-                self.frames.setdefault(name, [])
-                self.frames[name].append(sheet.subsurface(pygame.Rect(
-                    frame_location, self.rect.size)))
+    def set_frame(self, name, index):
+        self.image = self.frames[name][index]
+        self.mask = self.masks[name][index]
 
     def start_anim(self, name, delay):
         self.anim_name = name
@@ -139,80 +805,131 @@ class Sprite(pygame.sprite.Sprite):
     def is_playing(self):
         return bool(self.anim_name)
 
+    def state(self):
+        return tuple(self.groups()), {key: copy_value(value) for key, value in vars(self).items()
+                                      if not key.endswith("__g")}
+
+    def restore(self, state):
+        groups, attributes = state
+        self.__dict__.update((key, copy_value(value)) for key, value in attributes.items())
+        self.add(*groups)
+
+    def interpolate(self, alpha):
+        if not self.prev_pos:
+            return self.rect
+        x, y = self.prev_pos
+        return pygame.Rect(round(x + (self.rect.x - x) * alpha),
+                           round(y + (self.rect.y - y) * alpha),
+                           self.rect.width, self.rect.height)
+
+    def world_span(self):
+        left = self.start_pos[0] - self.camera_delta
+        return left, left + self.rect.width
+
     def on_map(self):
         return 0 < self.rect.right < game.width + self.rect.width
 
+    def kill(self):
+        self.destruct()
+
     def destruct(self):
-        super().kill()
+        if self.alive():
+            super().kill()
+            if self.pool:
+                self.pool.release(self)
 
 
 class Text(Sprite):
-    def __init__(self, text, pos, size, color, font=None,
-                 bg_color=(0, 0, 0, 0), padding=5, align_left=True):
-        super().__init__(pos, game.texts_group, game.all_sprites)
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.image = None
+        self.reset(*args, **kwargs)
+
+    def reset(self, text, pos, size, color, font=None,
+              bg_color=(0, 0, 0, 0), padding=5, align_left=True):
+        super().reset(pos, game.texts_group, game.all_sprites)
         self.pos = pos
         self.color = color
         self.bg_color = bg_color
         self.padding = padding
         self.align_left = align_left
-        self.font = pygame.font.Font(font, size)
+        self.font = get_font(font, size)
+        self.glyphs = glyphs_cache.setdefault((self.font, self.color), {})
+        self.text = None
+        if self.image:
+            self.align()
         self.set(text)
 
     def set(self, text):
         if text:
-            text_surf = self.font.render(str(text), 1, self.color)
-            w, h = text_surf.get_size()
-            background = pygame.Surface((w + self.padding * 2,
-                                         h + self.padding * 2),
-                                        pygame.SRCALPHA)
-            background.fill(self.bg_color)
-            background.blit(text_surf, (self.padding, self.padding))
-            self.image = background
-            self.rect = self.image.get_rect()
-            if self.align_left:
-                self.rect.topleft = self.pos
+            text = str(text)
+            if text == self.text:
+                return
+            self.text = text
+            if text.isdigit():
+                surfs = [self.glyph(char) for char in text]
             else:
-                self.rect.topright = self.pos
-
+                surfs = [self.font.render(text, 1, self.color)]
+            size = (sum(surf.get_width() for surf in surfs) + self.padding * 2,
+                    max(surf.get_height() for surf in surfs) + self.padding * 2)
+            if not self.image or self.image.get_size() != size:
+                self.image = pygame.Surface(size, pygame.SRCALPHA)
+                self.rect = self.image.get_rect()
+                self.align()
+            self.image.fill(self.bg_color)
+            x = self.padding
+            for surf in surfs:
+                self.image.blit(surf, (x, self.padding))
+                x += surf.get_width()
+
+    def align(self):
+        if self.align_left:
+            self.rect.topleft = self.pos
+        else:
+            self.rect.topright = self.pos
 
-class Background(Sprite):
-    def __init__(self, image, x, group):
-        super().__init__((x, 0), group, game.all_backs_group, game.all_sprites)
-        self.image = image
-        self.rect = self.image.get_rect()
-        self.rect.bottomleft = x, game.height
+    def glyph(self, char):
+        if char not in self.glyphs:
+            self.glyphs[char] = self.font.render(char, 1, self.color)
+        return self.glyphs[char]
 
 
 class Player(Sprite):
     def __init__(self, pos, jump_speed):
-        super().__init__(pos, game.player_group, game.all_sprites)
-        self.cut_sheet(player_jump_sheet, "jump", 6, 1)
-        self.cut_sheet(player_landing_sheet, "landing", 6, 1)
-        self.cut_sheet(player_die_sheet, "die", 15, 1)
-        self.image = self.frames["jump"][0]
+        super().__init__()
+        self.push_sound = assets.get("push_sound")
+        self.landing_sound = assets.get("player_landing_sound")
+        self.die_sound = assets.get("player_die_sound")
+
+        self.push_speed = PUSH_SPEED
+        self.push_dist = PUSH_DIST
+        self.push_acc = self.push_speed ** 2 / (2 * self.push_dist) * -1
+
+        self.reset(pos, jump_speed)
+
+    def reset(self, pos, jump_speed):
+        super().reset(pos, game.player_group, game.all_sprites)
+        animations, masks = assets.get("player")
+        self.frames = animations[self.flipped]
+        self.masks = masks[self.flipped]
+        self.set_frame("jump", 0)
         self.rect = self.image.get_rect()
         self.rect.bottomleft = pos
         self.pos = list(pos)
         self.move_pos = list(pos)
 
-        self.push_sound = push_sound
-        self.landing_sound = landing_sound
-        self.die_sound = player_die_sound
-
         self.level = 0
+        self.first_platform = None
         self.last_level = None
 
         self.push_phase = 0
         self.in_pushing = False
-        self.push_speed = 500
-        self.push_dist = 80
-        self.push_acc = self.push_speed ** 2 / (2 * self.push_dist) * -1
 
         self.is_jump = True
         self.jump_phase = 0
         self.jump_speed = jump_speed
 
-        self.start_anim("jump", 0.15)
+        self.start_anim("jump", PLAYER_JUMP_DELAY)
 
     def update(self, time, push=False):
         super().update(time)
@@ -224,8 +941,8 @@ class Player(Sprite):
             self.push_phase = 0
             self.in_pushing = True
             self.move_pos[0] = self.pos[0]
-        platform = pygame.sprite.spritecollideany(self, game.platforms_group)
-        enemy = pygame.sprite.spritecollideany(self, game.enemies_group)
+        platform = game.platforms_group.collideany(self)
+        enemy = game.enemies_group.collideany(self)
         if self.in_pushing and not platform:
             self.pos[0] = (self.move_pos[0] + self.push_speed * self.push_phase
                            + (self.push_acc * self.push_phase ** 2) / 2)
@@ -233,7 +950,7 @@ class Player(Sprite):
                 self.in_pushing = False
 
         if platform and pygame.sprite.collide_mask(self, platform):
-            if (self.pos[1] - platform.rect.top <= 10 or
+            if (self.pos[1] - platform.rect.top <= LANDING_TOLERANCE or
                     platform.rect.left < self.rect.left <
                     platform.rect.right - self.rect.width):
                 self.is_jump = False
@@ -241,7 +958,7 @@ class Player(Sprite):
                 self.move_pos[1] = platform.rect.topleft[1]
                 if not self.is_playing() and self.prev_name != "landing":
                     if self.on_map():
-                        self.start_anim("landing", 0.01)
+                        self.start_anim("landing", LANDING_DELAY)
                     self.landing_sound.play()
                     self.is_jump = True
             elif self.rect.right > platform.rect.right:
@@ -252,7 +969,7 @@ class Player(Sprite):
 
         if self.is_jump:
             if not self.is_playing() and self.prev_name != "jump":
-                self.start_anim("jump", 0.15)
+                self.start_anim("jump", PLAYER_JUMP_DELAY)
 
             self.pos[1] = (self.move_pos[1] - self.jump_speed * self.jump_phase +
                            (GRAVITY * self.jump_phase ** 2) / 2)
@@ -265,14 +982,14 @@ class Player(Sprite):
             enemy.kill()
 
         game.camera.set_position(self.pos)
+        game.player_group.move(self)
 
-        for platform in game.platforms_group.sprites():
-            proj = platform.rect.copy()
-            proj.y = 0
-            proj.height = game.height
-            if self.rect.colliderect(proj) and hash(platform) != self.last_level:
+        platform = self.last_level.next if self.last_level else self.first_platform
+        while platform and platform.rect.left < self.rect.right:
+            if platform.rect.right > self.rect.left:
                 self.level += 1
-                self.last_level = hash(platform)
+            self.last_level = platform
+            platform = platform.next
 
         if self.death:
             if self.anim_name != "die" and self.prev_name != "die":
@@ -284,25 +1001,32 @@ class Player(Sprite):
             if self.prev_name == "die":
                 super().kill()
 
+    def world_span(self):
+        return self.pos[0], self.pos[0] + self.rect.width
+
     def kill(self):
         self.death = True if not GOD_MODE else False
 
 
 class Enemy(Sprite):
     def __init__(self, pos, jump_speed):
-        super().__init__(pos, game.enemies_group, game.all_sprites, randflip=True)
-        self.cut_sheet(enemy_jump_sheet, "jump", 13, 1)
-        self.cut_sheet(enemy_landing_sheet, "landing", 5, 1)
-        self.cut_sheet(enemy_die_sheet, "die", 15, 1)
-        self.image = self.frames["jump"][0]
+        super().__init__()
+        self.landing_sound = assets.get("enemy_landing_sound")
+        self.die_sound = assets.get("enemy_die_sound")
+
+        self.reset(pos, jump_speed)
+
+    def reset(self, pos, jump_speed):
+        super().reset(pos, game.enemies_group, game.all_sprites, randflip=True)
+        animations, masks = assets.get("enemy")
+        self.frames = animations[self.flipped]
+        self.masks = masks[self.flipped]
+        self.set_frame("jump", 0)
         self.rect = self.image.get_rect()
         self.rect.bottomleft = pos
         self.pos = list(pos)
         self.move_pos = list(pos)
 
-        self.landing_sound = landing_sound
-        self.die_sound = enemy_die_sound
-
         self.is_jump = True
         self.jump_phase = 0
         self.jump_speed = jump_speed
@@ -317,28 +1041,28 @@ class Enemy(Sprite):
         self.jump_phase += time
         self.push_phase += time
 
-        platform = pygame.sprite.spritecollideany(self, game.platforms_group)
+        platform = game.platforms_group.collideany(self)
         if platform and pygame.sprite.collide_mask(self, platform):
-            if (self.pos[1] - platform.rect.top <= 10 or
+            if (self.pos[1] - platform.rect.top <= LANDING_TOLERANCE or
                     platform.rect.left < self.rect.left <
                     platform.rect.right - self.rect.width):
                 self.is_jump = False
                 self.jump_phase = 0
                 self.move_pos[1] = platform.rect.topleft[1]
                 if not self.is_playing() and self.prev_name != "landing":
-                    self.start_anim("landing", 0.01)
+                    self.start_anim("landing", LANDING_DELAY)
                     if self.on_map():
                         self.landing_sound.play()
                     self.is_jump = True
 
         if self.is_jump:
             if not self.is_playing() and self.prev_name != "jump":
-                self.start_anim("jump", 0.1)
+                self.start_anim("jump", ENEMY_JUMP_DELAY)
 
             self.pos[1] = (self.move_pos[1] - self.jump_speed * self.jump_phase +
                            (GRAVITY * self.jump_phase ** 2) / 2)
 
-        player = pygame.sprite.spritecollideany(self, game.player_group)
+        player = game.player_group.collideany(self)
         if not self.death and player and sum([bool(
                 self.rect.collidepoint(x, y))
             for x, y in (player.rect.topleft,
@@ -347,7 +1071,7 @@ class Enemy(Sprite):
             player.kill()
 
         if not self.death:
-            enemy = pygame.sprite.spritecollideany(self, game.enemies_group)
+            enemy = game.enemies_group.collideany(self)
             if player and (player.rect.x < self.rect.left or
                            player.rect.x > self.rect.left):
                 delta = self.rect.x - player.rect.x
@@ -357,6 +1081,7 @@ class Enemy(Sprite):
 
         self.start_pos[0] = self.pos[0]
         self.rect.bottom = self.pos[1]
+        game.enemies_group.move(self)
 
         if self.death:
             if self.anim_name != "die" and self.prev_name != "die":
@@ -375,28 +1100,36 @@ class Enemy(Sprite):
 
 class Bomb(Sprite):
     def __init__(self, pos):
-        super().__init__(pos, game.bombs_group, game.all_sprites)
-        self.cut_sheet(fire_sheet, "fire", 7, 1)
-        self.cut_sheet(boom_sheet, "boom", 6, 1)
-        self.image = self.frames["fire"][0]
-        self.rect = self.image.get_rect()
-        self.rect.bottom = pos[1]
-        self.radius = 200
+        super().__init__()
+        self.radius = BOMB_RADIUS
 
-        self.boom_sound = boom_sound
+        self.boom_sound = assets.get("boom_sound")
 
         self.player = None
 
+        self.reset(pos)
+
+    def reset(self, pos):
+        super().reset(pos, game.bombs_group, game.all_sprites)
+        animations, masks = assets.get("bomb")
+        self.frames = animations[self.flipped]
+        self.masks = masks[self.flipped]
+        self.set_frame("fire", 0)
+        self.rect = self.image.get_rect()
+        self.rect.bottom = pos[1]
+
     def update(self, time):
         super().update(time)
         player_collision = pygame.sprite.collide_mask(self, game.player)
         if player_collision and not self.is_playing() and self.prev_name != "fire":
-            self.start_anim("fire", 0.3)
+            self.start_anim("fire", FUSE_DELAY)
         if not self.is_playing() and self.prev_name == "fire":
-            for entity in (game.enemies_group.sprites() +
-                           game.player_group.sprites()):
-                if pygame.sprite.collide_circle(self, entity):
-                    entity.kill()
+            left, right = self.world_span()
+            for group in game.enemies_group, game.player_group:
+                for entity in group.query(left - self.radius,
+                                          right + self.radius):
+                    if pygame.sprite.collide_circle(self, entity):
+                        entity.kill()
             self.start_anim("boom", 0.15)
             self.boom_sound.play()
         if self.prev_name == "boom":
@@ -405,11 +1138,86 @@ class Bomb(Sprite):
 
 class Platform(Sprite):
     def __init__(self, x, height, length):
-        super().__init__((x, game.height - height), game.platforms_group, game.all_sprites)
-        self.image = pygame.Surface((length, height))
-        pygame.draw.rect(self.image, "#7A2029", (0, 0, length, height))
-        self.rect = self.image.get_rect()
+        super().__init__()
+        self.reset(x, height, length)
+
+    def reset(self, x, height, length):
+        super().reset((x, game.height - height), game.platforms_group, game.all_sprites)
+        self.image = platform_sheet(length, height)
+        self.area = pygame.Rect(0, 0, length, height)
+        self.mask = solid_mask(self.area.size)
+        self.rect = self.area.copy()
         self.rect.bottomleft = (x, game.height)
+        self.next = None
+
+
+class RecordsStore:
+    schema = ("CREATE TABLE IF NOT EXISTS records ("
+              "id INTEGER PRIMARY KEY, time TEXT NOT NULL, "
+              "round_time INTEGER NOT NULL, score INTEGER NOT NULL)",
+              "CREATE INDEX IF NOT EXISTS records_top "
+              "ON records (score DESC, round_time, time)")
+    columns = "SELECT time, round_time, score FROM records "
+    order = "ORDER BY score DESC, round_time, time "
+
+    def __init__(self, path, legacy=None):
+        self.path = path
+        self.version = 0
+        self.queue = queue.Queue()
+
+        created = not os.path.isfile(path)
+        self.db = sqlite3.connect(path)
+        for statement in self.schema:
+            self.db.execute(statement)
+        if created and legacy and os.path.isfile(legacy):
+            self.import_legacy(legacy)
+        self.db.commit()
+
+        self.thread = threading.Thread(target=self.write_loop, daemon=True)
+        self.thread.start()
+
+    def import_legacy(self, legacy):
+        records = []
+        with open(legacy, newline='') as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            for row in reader:
+                try:
+                    records.append((str(datetime.strptime(row[0], RECORDS_TIME_FORMAT)),
+                                    int(float(row[1])), int(row[2])))
+                except (IndexError, ValueError):
+                    print(f"Пропущена повреждённая запись рекорда: {row}")
+        self.db.executemany("INSERT INTO records (time, round_time, score) "
+                            "VALUES (?, ?, ?)", records)
+
+    def add(self, time, round_time, score):
+        self.queue.put((str(time.replace(microsecond=0)), int(round_time), int(score)))
+
+    def top(self, count=RECORDS_SHOWN):
+        return self.rows(self.columns + self.order + "LIMIT ?", (count,))
+
+    def rows(self, query, args):
+        return [(datetime.fromisoformat(time).strftime(RECORDS_TIME_FORMAT),
+                 round_time, score)
+                for time, round_time, score in self.db.execute(query, args)]
+
+    def write_loop(self):
+        db = sqlite3.connect(self.path)
+        while True:
+            row = self.queue.get()
+            if row is None:
+                break
+            db.execute("INSERT INTO records (time, round_time, score) "
+                       "VALUES (?, ?, ?)", row)
+            db.commit()
+            self.version += 1
+        db.close()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        self.db.close()
 
 
 class Form:
@@ -452,19 +1260,16 @@ class Start(Form):
                                                         manager=self.manager)
 
         self.music = menu_music
-        self.channel = None
 
     def main(self, events, timer):
-        time_delta = timer.tick() / 1000.0
-        if not self.channel:
-            self.channel = self.music.play(-1)
+        time_delta = timer.tick(FPS_LIMIT) / 1000.0
+        music_player.play(self.music)
         for event in events:
             if (event.type == pygame.USEREVENT and
                     event.user_type == pygame_gui.UI_BUTTON_PRESSED):
                 if event.ui_element == self.exit_button:
                     sys.exit()
                 if event.ui_element == self.play_button:
-                    self.channel = self.music.stop()
                     game.restart_game()
                     self.is_visible = False
                     game.is_visible = True
@@ -503,21 +1308,30 @@ class Records(Form):
                                                         text='ok',
                                                         manager=self.manager)
 
-        if not os.path.isfile("records.csv"):
-            open("records.csv", "w+").write("time,round_time,score")
+        self.version = None
+        self.text = None
+        self.text_box = pygame_gui.elements.UITextBox(html_text="",
+                                                      relative_rect=self.text_rect,
+                                                      manager=self.manager)
 
+    def load_records(self):
+        version = records_store.version
+        if version == self.version:
+            return
+        self.version = version
 
-    def main(self, events, timer):
-        time_delta = timer.tick() / 1000.0
-
-        header, *records = csv.reader(open("records.csv", newline=''))
         text = "DATE & TIME  |  ROUND TIME  |  SCORE<br>"
-        for row in records:
-            text += "  |  ".join(row) + "<br>"
+        for row in records_store.top():
+            text += "  |  ".join(map(str, row)) + "<br>"
 
-        pygame_gui.elements.UITextBox(html_text=text,
-                                      relative_rect=self.text_rect,
-                                      manager=self.manager)
+        if text != self.text:
+            self.text = text
+            self.text_box.set_text(text)
+
+    def main(self, events, timer):
+        time_delta = timer.tick(FPS_LIMIT) / 1000.0
+
+        self.load_records()
 
         for event in events:
             if event.type == pygame.USEREVENT:
@@ -595,41 +1409,13 @@ class Settings(Form):
         open("settings.json", "w").write(json.dumps(self.settings))
 
     def set_volumes(self):
-        start_form.music.set_volume(MENU_MUSIC_VOLUME *
-                                    self.settings["master_vol"] *
-                                    self.settings["music_vol"])
-        game.music.set_volume(GAME_MUSIC_VOLUME *
-                              self.settings["master_vol"] *
-                              self.settings["music_vol"])
-        pause.music.set_volume(PAUSE_MUSIC_VOLUME *
-                               self.settings["master_vol"] *
-                               self.settings["music_vol"])
-
-        player = game.player
-        if player:
-            player.push_sound.set_volume(PLAYER_PUSH_VOLUME *
-                                         self.settings["master_vol"] *
-                                         self.settings["effects_vol"])
-            player.landing_sound.set_volume(PLAYER_LANDING_VOLUME *
-                                            self.settings["master_vol"] *
-                                            self.settings["effects_vol"])
-            player.die_sound.set_volume(PLAYER_DIE_VOLUME *
-                                        self.settings["master_vol"] *
-                                        self.settings["effects_vol"])
-        for enemy in game.enemies_group.sprites():
-            enemy.landing_sound.set_volume(ENEMY_LANDING_VOLUME *
-                                           self.settings["master_vol"] *
-                                           self.settings["effects_vol"])
-            enemy.die_sound.set_volume(ENEMY_DIE_VOLUME *
-                                       self.settings["master_vol"] *
-                                       self.settings["effects_vol"])
-        for bomb in game.bombs_group.sprites():
-            bomb.boom_sound.set_volume(BOOM_VOLUME *
-                                       self.settings["master_vol"] *
-                                       self.settings["effects_vol"])
+        volume_bus.set_gain("music", self.settings["master_vol"] *
+                            self.settings["music_vol"])
+        volume_bus.set_gain("effects", self.settings["master_vol"] *
+                            self.settings["effects_vol"])
 
     def main(self, events, timer):
-        time_delta = timer.tick() / 1000.0
+        time_delta = timer.tick(FPS_LIMIT) / 1000.0
 
         for event in events:
             if event.type == pygame.USEREVENT:
@@ -660,66 +1446,114 @@ class Game(Form):
 
         self.all_sprites = pygame.sprite.Group()
 
-        self.all_backs_group = pygame.sprite.Group()
-        self.sky_group = pygame.sprite.Group()
-        self.bg_group = pygame.sprite.Group()
-        self.middle_group = pygame.sprite.Group()
-        self.fg_group = pygame.sprite.Group()
-        self.grass_group = pygame.sprite.Group()
+        self.background = None
+        self.foreground = None
+        self.end_image = None
 
         self.texts_group = pygame.sprite.Group()
-        self.player_group = pygame.sprite.Group()
-        self.enemies_group = pygame.sprite.Group()
-        self.bombs_group = pygame.sprite.Group()
-        self.platforms_group = pygame.sprite.Group()
+        self.player_group = SpatialGroup()
+        self.enemies_group = SpatialGroup()
+        self.bombs_group = SpatialGroup()
+        self.platforms_group = SpatialGroup()
 
         self.player = None
+        self.pools = {cls: Pool(cls) for cls in (Player, Enemy, Bomb, Platform, Text)}
+
+        self.backdrop = pygame.Surface((self.width, self.height)).convert()
+        self.drawn = {}
+        self.drawn_x = None
+        self.view_x = 0
+        self.view = 0, self.width
+        self.redraw = True
+        self.ticks = 0
+        self.dormant_time = 0
+        self.seed = None
+        self.rng = Random()
+        self.pushes = []
+        self.accumulator = 0
+        self.pushed = False
+        self.prev_view_x = 0
 
         self.music = game_music
-        self.channel = None
 
-    def restart_game(self):
+    def load_assets(self):
+        if not assets.ready(*game_assets):
+            self.screen.fill("black")
+            text = get_font(None, 50).render("Loading...", 1, "white")
+            self.screen.blit(text, text.get_rect(center=(self.width // 2, self.height // 2)))
+            pygame.display.update()
+        try:
+            for name in game_assets:
+                assets.get(name)
+        except FileNotFoundError as error:
+            if HEADLESS:
+                raise
+            print(error)
+            self.show_error(str(error))
+            sys.exit(1)
+        if not self.background:
+            self.background = Parallax((self.width, self.height),
+                                       (assets.get("sky"), 0.1), (assets.get("bg"), 0.3),
+                                       (assets.get("middle"), 0.5), (assets.get("fg"), 0.8))
+            self.foreground = Parallax((self.width, self.height), (assets.get("grass"), 1.5))
+            self.end_image = assets.get("end")
+
+    def show_error(self, message):
+        self.screen.fill("black")
+        text = get_font(None, 30).render(message, 1, "red")
+        self.screen.blit(text, text.get_rect(center=(self.width // 2, self.height // 2)))
+        pygame.display.update()
+        while not any(event.type in (pygame.QUIT, pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN)
+                      for event in pygame.event.get()):
+            pygame.time.wait(50)
+
+    def restart_game(self, seed=None):
+        self.load_assets()
         for sprite in self.all_sprites.sprites():
             sprite.destruct()
 
+        self.seed = randrange(2 ** 32) if seed is None else seed
+        self.rng = Random(self.seed)
+        self.pushes = []
+        self.ticks = 0
+        self.dormant_time = 0
         self.camera = Camera()
 
-        self.last_sky = Background(sky_image, 0, self.sky_group)
-        self.last_bg = Background(bg_image, 0, self.bg_group)
-        self.last_middle = Background(middle_image, 0, self.middle_group)
-        self.last_fg = Background(fg_image, 0, self.fg_group)
-        self.last_grass = Background(grass_image, 0, self.grass_group)
-
-        self.last_platform = Platform(30, 100, 500)
-        self.last_enemy = Enemy((-100, 400), 0)
-        self.last_bomb = Bomb((-150, 400))
-        self.player = Player((50, 300), 300)
-
-        self.camera.set_target(self.player, 600)
-
-        self.time_text = Text("0", (0, 0), 50, "green", bg_color=(0, 0, 0, 190))
-        self.level_text = Text("0", (self.width, 0), 50, "red", bg_color=(0, 0, 0, 190), align_left=False)
-        self.fps_text = Text("0", (self.width, 480), 20, "white", bg_color=(0, 0, 0, 255), align_left=False,
-                             padding=1)
-        if not SHOW_FPS_IN_GAME:
-            self.fps_text.kill()
+        self.last_platform = self.spawn(Platform, *START_PLATFORM)
+        self.last_enemy = self.spawn(Enemy, (-100, 400), 0)
+        self.last_bomb = self.spawn(Bomb, (-150, 400))
+        self.player = self.spawn(Player, PLAYER_START, PLAYER_JUMP_SPEED)
+
+        self.player.first_platform = self.last_platform
+        self.camera.set_target(self.player, CAMERA_LIMIT)
+
+        self.time_text = self.spawn(Text, "0", (0, 0), 50, "green", bg_color=(0, 0, 0, 190))
+        self.level_text = self.spawn(Text, "0", (self.width, 0), 50, "red", bg_color=(0, 0, 0, 190), align_left=False)
+        self.fps_text = None
+        if SHOW_FPS_IN_GAME:
+            self.fps_text = self.spawn(Text, "0", (self.width, 480), 20, "white",
+                                       bg_color=(0, 0, 0, 255), align_left=False, padding=1)
         self.game_over = False
         self.on_pause = False
         self.end_phase = 0
         self.round_time = 0
         self.record_writed = False
+        self.view_x = self.prev_view_x = self.camera.x
+        self.view = self.camera.viewport()
+        self.redraw = True
+        self.accumulator = 0
+        self.pushed = False
 
-        if not self.channel:
-            self.channel = self.music.play(-1)
+        music_player.play(self.music)
 
     def main(self, events, timer):
-        time = timer.tick() / 1000.0
-        settings_form.set_volumes()
+        time = timer.tick(FPS_LIMIT) / 1000.0
+        push = False
         for event in events:
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
                     if not self.game_over:
-                        self.player_group.update(time, True)
+                        push = True
                     else:
                         self.restart_game()
                 if event.key == pygame.K_ESCAPE:
@@ -727,19 +1561,7 @@ class Game(Form):
                         self.on_pause = not self.on_pause
                         pause.is_visible = self.on_pause
                         if not self.on_pause:
-                            pause.channel = pause.music.stop()
-
-        self.sky_group.draw(self.screen)
-        self.bg_group.draw(self.screen)
-        self.middle_group.draw(self.screen)
-        self.fg_group.draw(self.screen)
-
-        self.platforms_group.draw(self.screen)
-        self.bombs_group.draw(self.screen)
-        self.player_group.draw(self.screen)
-        self.enemies_group.draw(self.screen)
-
-        self.grass_group.draw(self.screen)
+                            pause.hide()
 
         if self.player not in self.player_group:
             self.end_phase += time
@@ -748,85 +1570,205 @@ class Game(Form):
                 self.camera.move_from(randrange(-20, 20))
             if not self.game_over:
                 self.game_over = True
-                go_text = Text("GAME OVER", (0, 200), 100, "white",
-                               bg_color=(0, 0, 0, 220), padding=20)
-                Text("Press space to restart", (0, go_text.rect.bottom + 5),
-                     50, "white", bg_color=(0, 0, 0, 220), padding=10)
-
-            self.screen.blit(end_image, (0, 0))
-
-        self.texts_group.draw(self.screen)
+                if RECORD_REPLAYS:
+                    filename = os.path.join(REPLAYS_DIR, "{:%Y%m%d-%H%M%S}-{}.jrp".format(
+                        datetime.now(), self.player.level))
+                    threading.Thread(target=save_replay, daemon=True,
+                                     args=(filename, self.seed, PHYSICS_STEP,
+                                           self.ticks, self.pushes)).start()
+                go_text = self.spawn(Text, "GAME OVER", (0, 200), 100, "white",
+                                     bg_color=(0, 0, 0, 220), padding=20)
+                self.spawn(Text, "Press space to restart", (0, go_text.rect.bottom + 5),
+                           50, "white", bg_color=(0, 0, 0, 220), padding=10)
+                self.redraw = True
+
+        if not self.on_pause:
+            music_player.play(self.music)
+
+            self.pushed = self.pushed or push
+            self.accumulator = min(self.accumulator + time,
+                                   PHYSICS_STEP * MAX_PHYSICS_STEPS)
+            while self.accumulator >= PHYSICS_STEP:
+                self.step(PHYSICS_STEP, self.pushed)
+                self.pushed = False
+                self.accumulator -= PHYSICS_STEP
+
+            if self.player.death and not self.record_writed:
+                records_store.add(datetime.now(), self.round_time, self.player.level)
+                self.record_writed = True
+
+            self.level_text.set(self.player.level)
+            self.time_text.set(int(self.round_time))
+            if self.fps_text:
+                self.fps_text.set("{:0.0f}".format(timer.get_fps()))
+
+        if not (self.on_pause and DIRTY_RENDERING and pause.frozen):
+            dirty = self.draw(self.accumulator / PHYSICS_STEP)
 
         if self.on_pause:
-            self.channel.pause()
             return False
 
-        self.channel.unpause()
+        if dirty is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty)
+
+    def step(self, time, push=False):
+        if push:
+            self.pushes.append(self.ticks)
+            self.player_group.update(time, True)
 
         self.round_time += time if not self.player.death else 0
 
-        if self.last_sky.rect.right < 2 * self.width:
-            self.last_sky = Background(sky_image, self.last_sky.rect.right - 5, self.sky_group)
-        if self.last_bg.rect.right < 2 * self.width:
-            self.last_bg = Background(bg_image, self.last_bg.rect.right - 5, self.bg_group)
-        if self.last_middle.rect.right < 2 * self.width:
-            self.last_middle = Background(middle_image, self.last_middle.rect.right - 5, self.middle_group)
-        if self.last_fg.rect.right < 2 * self.width:
-            self.last_fg = Background(fg_image, self.last_fg.rect.right - 5, self.fg_group)
-        if self.last_grass.rect.right < 2 * self.width:
-            self.last_grass = Background(grass_image, self.last_grass.rect.right - 5, self.grass_group)
-
         if self.last_platform.rect.right < 2 * self.width:
-            new_x = self.last_platform.rect.right + randrange(150, 300)
-            height = randrange(45, 110)
-            length = randrange(150, 500)
-
-            self.last_platform = Platform(new_x, height, length)
-
-            for _ in range(randrange(0, 3)):
-                enem_x = randrange(new_x, new_x + length - self.last_enemy.rect.width)
-                jump_speed = randrange(200, 350)
-                self.last_enemy = Enemy((enem_x, self.height - height - self.last_enemy.rect.height), jump_speed)
-
-            if randrange(0, 101) < 20:
-                bomb_x = randrange(new_x, new_x + length - self.last_bomb.rect.width)
-                self.last_bomb = Bomb((bomb_x, self.height - height))
-
-        if self.player.death and not self.record_writed:
-            header, *records = csv.reader(open("records.csv", newline=''))
-            cur_time = datetime.now().strftime("%d.%m.%Y %H:%M:%S")
-            score = self.player.level
-            records.append([cur_time, int(self.round_time), score])
-            records.sort(key=lambda x: (-int(x[2]), int(float(x[1])), x[0]))
-            writer = csv.writer(open("records.csv", "w", newline=''))
-            writer.writerow(header)
-            for row in records[:min(5, len(records))]:
-                writer.writerow(row)
-            self.record_writed = True
-            pygame_gui.elements.UITextBox
-
-        self.camera.apply(self.sky_group, 0.1)
-        self.camera.apply(self.bg_group, 0.3)
-        self.camera.apply(self.middle_group, 0.5)
-        self.camera.apply(self.fg_group, 0.8)
-        self.camera.apply(self.grass_group, 1.5)
-
-        self.camera.apply(self.platforms_group)
-        self.camera.apply(self.enemies_group)
-        self.camera.apply(self.bombs_group)
-
-        self.all_backs_group.update(time)
+            new_x = self.last_platform.rect.right + self.rng.randrange(*PLATFORM_GAP)
+            height = self.rng.randrange(*PLATFORM_HEIGHT)
+            length = self.rng.randrange(*PLATFORM_LENGTH)
+
+            platform = self.spawn(Platform, new_x, height, length)
+            self.last_platform.next = platform
+            self.last_platform = platform
+
+            for _ in range(self.rng.randrange(0, MAX_ENEMIES_PER_PLATFORM + 1)):
+                enem_x = self.rng.randrange(new_x, new_x + length - self.last_enemy.rect.width)
+                jump_speed = self.rng.randrange(*ENEMY_JUMP_SPEED)
+                self.last_enemy = self.spawn(Enemy, (enem_x, self.height - height - self.last_enemy.rect.height), jump_speed)
+
+            if self.rng.randrange(0, 101) < BOMB_CHANCE:
+                bomb_x = self.rng.randrange(new_x, new_x + length - self.last_bomb.rect.width)
+                self.last_bomb = self.spawn(Bomb, (bomb_x, self.height - height))
+
+        self.prev_view_x = self.view_x
+        self.view_x = self.camera.x
+        self.view = self.camera.viewport()
+        left, right = self.camera.viewport(ACTIVE_MARGIN)
+        retire = self.camera.viewport(CULL_MARGIN)[0]
+        self.ticks += 1
+        self.dormant_time += time
+        wake = self.ticks % OFFSCREEN_UPDATE_INTERVAL == 0
+        updates = []
+        for group in self.enemies_group, self.bombs_group, self.platforms_group:
+            for sprite in group.sprites():
+                sprite_left, sprite_right = sprite.world_span()
+                if sprite_right < retire:
+                    sprite.destruct()
+                elif sprite_left < right and sprite_right > left:
+                    updates.append((sprite, time))
+                elif wake:
+                    updates.append((sprite, self.dormant_time))
+        if wake:
+            self.dormant_time = 0
+        for sprite, _ in updates:
+            sprite.prev_pos = sprite.rect.topleft
+        self.player.prev_pos = self.player.rect.topleft
+        self.camera.apply(sprite for sprite, _ in updates)
 
         self.player_group.update(time)
-        self.enemies_group.update(time)
-        self.bombs_group.update(time)
-        self.platforms_group.update(time)
-
-        self.level_text.set(self.player.level)
-        self.time_text.set(int(self.round_time))
-        self.fps_text.set("{:0.0f}".format(timer.get_fps()))
-
-        pygame.display.flip()
+        for sprite, sprite_time in updates:
+            sprite.update(sprite_time)
+
+    def snapshot(self):
+        sprites = [sprite for sprite in self.all_sprites if not isinstance(sprite, Text)]
+        for sprite in (self.last_platform, self.last_enemy, self.last_bomb, self.player,
+                       self.player.last_level, self.player.first_platform):
+            if sprite and sprite not in sprites:
+                sprites.append(sprite)
+        return (self.rng.getstate(), self.camera.x, self.camera.target, self.camera.limit,
+                self.ticks, self.dormant_time, self.round_time, self.end_phase,
+                self.game_over, self.record_writed, tuple(self.pushes),
+                self.last_platform, self.last_enemy, self.last_bomb, self.player,
+                tuple((sprite, sprite.state()) for sprite in sprites))
+
+    def restore(self, snapshot):
+        (rng_state, self.camera.x, self.camera.target, self.camera.limit,
+         self.ticks, self.dormant_time, self.round_time, self.end_phase,
+         self.game_over, self.record_writed, pushes,
+         self.last_platform, self.last_enemy, self.last_bomb, self.player,
+         sprites) = snapshot
+        self.rng.setstate(rng_state)
+        self.pushes = list(pushes)
+
+        hud = self.time_text, self.level_text, self.fps_text
+        for sprite in self.all_sprites.sprites():
+            if not isinstance(sprite, Text) or not (self.game_over or sprite in hud):
+                sprite.destruct()
+        for sprite, state in sprites:
+            sprite.restore(state)
+        for pool in self.pools.values():
+            pool.free = [sprite for sprite in dict.fromkeys(pool.free) if not sprite.alive()]
+
+        self.view_x = self.prev_view_x = self.camera.x
+        self.view = self.camera.viewport()
+        self.redraw = True
+        self.accumulator = 0
+        self.pushed = False
+
+    def simulate(self, frames, time, pushes=(), frame_times=None, policy=None):
+        pushes = set(pushes)
+        for frame in range(frames):
+            if self.player not in self.player_group:
+                return frame
+            push = policy(self) if policy else frame in pushes
+            if frame_times is None:
+                self.step(time, push)
+            else:
+                started = perf_counter()
+                self.step(time, push)
+                frame_times.append(perf_counter() - started)
+        return frames
+
+    def spawn(self, cls, *args, **kwargs):
+        return self.pools[cls].acquire(*args, **kwargs)
+
+    def draw(self, alpha=1):
+        view_x = self.prev_view_x + (self.view_x - self.prev_view_x) * alpha
+        layers = [[(sprite, sprite.interpolate(alpha)) for sprite in group.visible(*self.view)]
+                  for group in (self.platforms_group, self.bombs_group,
+                                self.player_group, self.enemies_group)]
+        layers.append([(sprite, sprite.rect) for sprite in self.texts_group])
+        dirty = self.dirty_rects(layers) if DIRTY_RENDERING else None
+        if dirty is None or self.redraw or view_x != self.drawn_x:
+            backdrop = self.backdrop if DIRTY_RENDERING else self.screen
+            self.background.draw(backdrop, view_x)
+            self.drawn_x = view_x
+            self.redraw = False
+            dirty = None
+            clips = [self.screen.get_rect()]
+        else:
+            clips = dirty
+
+        for rect in clips:
+            self.screen.set_clip(rect)
+            if DIRTY_RENDERING:
+                self.screen.blit(self.backdrop, rect, rect)
+            for sprites in layers[:-1]:
+                self.screen.blits([(sprite.image, rect, sprite.area)
+                                   for sprite, rect in sprites], doreturn=False)
+
+            self.foreground.draw(self.screen, view_x)
+            if self.game_over:
+                self.screen.blit(self.end_image, (0, 0))
+            self.texts_group.draw(self.screen)
+        self.screen.set_clip(None)
+        return dirty
+
+    def dirty_rects(self, layers):
+        rects = []
+        drawn = {}
+        for sprites in layers:
+            for sprite, rect in sprites:
+                state = sprite.image, tuple(rect), getattr(sprite, "text", None)
+                drawn[sprite] = state
+                old = self.drawn.pop(sprite, None)
+                if old != state:
+                    rects.append(pygame.Rect(rect))
+                    if old:
+                        rects.append(pygame.Rect(old[1]))
+        rects.extend(pygame.Rect(state[1]) for state in self.drawn.values())
+        self.drawn = drawn
+        if len(rects) > 16:
+            rects = [rects[0].unionall(rects)]
+        return rects
 
 
 class Pause(Form):
@@ -858,30 +1800,36 @@ class Pause(Form):
         self.exit_button = pygame_gui.elements.UIButton(relative_rect=buttons_rect,
                                                         text='Exit',
                                                         manager=self.manager)
+        self.ui_rect = self.paused_text.rect.unionall(
+            [self.resume_button.rect, self.settings_button.rect,
+             self.exit_button.rect]).inflate(10, 10)
+        self.frozen = None
 
         self.music = pause_music
-        self.channel = None
+
+    def hide(self):
+        self.is_visible = False
+        self.frozen = None
+        game.redraw = True
 
     def main(self, events, timer):
-        time_delta = timer.tick() / 1000.0
+        time_delta = timer.tick(FPS_LIMIT) / 1000.0
+        shown = game.is_visible
         game.is_visible = True
 
-        if not self.channel:
-            self.channel = self.music.play(-1)
+        music_player.play(self.music)
         for event in events:
             if (event.type == pygame.USEREVENT and
                     event.user_type == pygame_gui.UI_BUTTON_PRESSED):
                 if event.ui_element == self.exit_button:
-                    self.is_visible = False
+                    self.hide()
                     game.is_visible = False
                     start_form.is_visible = True
-                    self.channel = self.music.stop()
                 if event.ui_element == self.resume_button:
-                    self.channel = self.music.stop()
-                    self.is_visible = False
+                    self.hide()
                     game.on_pause = False
                 if event.ui_element == self.settings_button:
-                    self.is_visible = False
+                    self.hide()
                     game.is_visible = False
                     settings_form.prev_form = self
                     settings_form.is_visible = True
@@ -890,51 +1838,607 @@ class Pause(Form):
 
         self.manager.update(time_delta)
 
-        self.screen.blit(self.background, (0, 0))
-        self.manager.draw_ui(self.screen)
-
-        pygame.display.update()
-
-
-pygame.init()
-pygame.mixer.init()
+        if not DIRTY_RENDERING:
+            self.screen.blit(self.background, (0, 0))
+            self.manager.draw_ui(self.screen)
+            pygame.display.update()
+        elif shown and self.frozen is None:
+            self.screen.blit(self.background, (0, 0))
+            self.frozen = self.screen.copy()
+            self.manager.draw_ui(self.screen)
+            pygame.display.update()
+        elif shown:
+            self.screen.blit(self.frozen, self.ui_rect, self.ui_rect)
+            self.manager.draw_ui(self.screen)
+            pygame.display.update(self.ui_rect)
+
+
+started = perf_counter()
+if HEADLESS:
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    pygame.init()
+    pygame.mixer.quit()
+else:
+    pygame.init()
+    pygame.mixer.init()
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Jumper")
 timer = pygame.time.Clock()
 
 menu_bg_image = load_image("menu_bg.jpg", (WIDTH, HEIGHT))
 
-sky_image = load_image("sky.png", (WIDTH, HEIGHT))
-bg_image = load_image("bg.png", (WIDTH, HEIGHT))
-middle_image = load_image("middle.png", (WIDTH, HEIGHT))
-fg_image = load_image("fg.png", (WIDTH, HEIGHT))
-grass_image = load_image("grass.png")
-end_image = load_image("glitch.png", (WIDTH, HEIGHT))
-
-player_jump_sheet = load_image("player_jump.png")
-player_landing_sheet = load_image("player_landing.png")
-player_die_sheet = load_image("player_die.png")
-enemy_jump_sheet = load_image("enemy_jump.png")
-enemy_landing_sheet = load_image("enemy_landing.png")
-enemy_die_sheet = load_image("enemy_die.png")
-fire_sheet = load_image("fire.png")
-boom_sheet = load_image("boom.png")
-
-menu_music = load_sound("menu.mp3")
-game_music = load_sound("game.mp3")
-pause_music = load_sound("pause.mp3")
-landing_sound = load_sound("landing.wav")
-push_sound = load_sound("push.wav")
-boom_sound = load_sound("boom.wav")
-player_die_sound = load_sound("player_die.ogg")
-enemy_die_sound = load_sound("enemy_die.wav")
+music_player = MusicPlayer()
+menu_music = load_music("menu.mp3")
+game_music = load_music("game.mp3", resume=True)
+pause_music = load_music("pause.mp3")
+
+volume_bus = VolumeBus()
+volume_bus.add("music", menu_music, MENU_MUSIC_VOLUME)
+volume_bus.add("music", game_music, GAME_MUSIC_VOLUME)
+volume_bus.add("music", pause_music, PAUSE_MUSIC_VOLUME)
+
+voices = VoiceManager()
+assets = Assets()
+assets.add("sky", load_image, "sky.png", (WIDTH, HEIGHT))
+assets.add("bg", load_image, "bg.png", (WIDTH, HEIGHT))
+assets.add("middle", load_image, "middle.png", (WIDTH, HEIGHT))
+assets.add("fg", load_image, "fg.png", (WIDTH, HEIGHT))
+assets.add("grass", load_image, "grass.png")
+assets.add("end", load_image, "glitch.png", (WIDTH, HEIGHT))
+
+assets.add("atlas", load_atlas)
+assets.add("player", load_animations, ("jump", "player_jump"),
+           ("landing", "player_landing"), ("die", "player_die"))
+assets.add("enemy", load_animations, ("jump", "enemy_jump"),
+           ("landing", "enemy_landing"), ("die", "enemy_die"))
+assets.add("bomb", load_animations, ("fire", "fire"), ("boom", "boom"))
+
+assets.add("landing", load_sound, "landing.wav")
+assets.add("push", load_sound, "push.wav")
+assets.add("player_die", load_sound, "player_die.ogg")
+assets.add("enemy_die", load_sound, "enemy_die.wav")
+assets.add("boom", load_sound, "boom.wav")
+assets.add("push_sound", load_effect, "push", PLAYER_PUSH_VOLUME)
+assets.add("player_landing_sound", load_effect, "landing", PLAYER_LANDING_VOLUME)
+assets.add("player_die_sound", load_effect, "player_die", PLAYER_DIE_VOLUME)
+assets.add("enemy_landing_sound", load_effect, "landing", ENEMY_LANDING_VOLUME, ENEMY_VOICES)
+assets.add("enemy_die_sound", load_effect, "enemy_die", ENEMY_DIE_VOLUME, ENEMY_VOICES)
+assets.add("boom_sound", load_effect, "boom", BOOM_VOLUME, BOOM_VOICES)
+game_assets = tuple(assets.loaders)
+
+def anim_time(frames, delays, time):
+    return np.multiply(frames, (np.divide(delays, time)).astype(np.int64) + 1) * time
+
+
+def feet_span(mask, rows=10):
+    columns = np.flatnonzero(pygame.surfarray.array_red(mask.to_surface())[:, -rows:].any(1))
+    return int(columns[0]), int(columns[-1]) + 1
+
+
+class BatchSimulation:
+    causes = ("timeout", "fall", "enemy", "bomb")
+    window = np.arange(-2, 1)[:, None] if np else None
+    enemy_offsets = np.arange(MAX_ENEMIES_PER_PLATFORM)[:, None, None] if np else None
+    fields = ("ids", "live", "px", "py", "move_x", "move_y", "jump_phase", "push_phase",
+              "cooldown", "is_jump", "in_pushing", "camera", "count", "next_level", "unsettled",
+              "platforms", "enemies", "enemy_flags", "scratch")
+
+    def __init__(self, worlds, seed=None, platforms=BATCH_PLATFORMS, time=PHYSICS_STEP):
+        if np is None:
+            raise RuntimeError("BatchSimulation requires numpy")
+        self.n, self.k, self.time = worlds, platforms, time
+        self.rng = np.random.default_rng(seed)
+        self.ring = (np.arange(platforms) + self.window) % platforms
+
+        player, enemy, bomb = (assets.get(name)[0][0] for name in ("player", "enemy", "bomb"))
+        self.player_size = player["jump"][0].get_size()
+        self.enemy_size = enemy["jump"][0].get_size()
+        self.player_feet = feet_span(assets.get("player")[1][0]["jump"][0])
+        self.enemy_feet = feet_span(assets.get("enemy")[1][0]["jump"][0])
+        self.bomb_size = bomb["fire"][0].get_size()
+        times = anim_time([len(player["landing"]), len(player["jump"]), len(enemy["landing"]),
+                           len(enemy["jump"]), len(bomb["fire"])],
+                          [LANDING_DELAY, PLAYER_JUMP_DELAY, LANDING_DELAY,
+                           ENEMY_JUMP_DELAY, FUSE_DELAY], time)
+        self.player_cooldown, self.enemy_cooldown = times[0] + times[1], times[2] + times[3]
+        self.fuse = times[4]
+
+        n, k, e = worlds, platforms, MAX_ENEMIES_PER_PLATFORM
+        self.ids, self.worlds = np.arange(n), np.arange(n)
+        self.frame = 0
+        self.world_frames = 0
+        self.live = np.ones(n, bool)
+        self.cause = np.zeros(n, np.int8)
+        self.level = np.zeros(n, np.int32)
+        self.round_time = np.zeros(n)
+
+        self.px = np.full(n, PLAYER_START[0], np.float32)
+        self.py = np.full(n, PLAYER_START[1], np.float32)
+        self.move_x, self.move_y = self.px.copy(), self.py.copy()
+        self.jump_phase, self.push_phase, self.cooldown, self.camera = np.zeros((4, n), np.float32)
+        self.is_jump = np.ones(n, bool)
+        self.in_pushing = np.zeros(n, bool)
+        self.count = np.ones(n, np.int64)
+        self.next_level = np.zeros(n, np.int64)
+        self.unsettled = np.zeros(n, bool)
+
+        self.platforms = np.zeros((5, k, n), np.float32)
+        self.platforms[4] = -np.inf
+        self.enemies = np.zeros((6, e, k, n), np.float32)
+        self.enemy_flags = np.zeros((3, e, k, n), bool)
+        self.scratch = np.zeros((2, e, k, n), np.float32)
+        self.unpack()
+        x, height, length = START_PLATFORM
+        self.left[0], self.right[0], self.top[0] = x, x + length, HEIGHT - height
+        self.generate()
+        self.gather()
+
+    def unpack(self):
+        self.left, self.right, self.top, self.bx, self.bomb_fuse = self.platforms
+        (self.ex, self.ey, self.enemy_move_y, self.enemy_launch,
+         self.enemy_speed, self.enemy_ready) = self.enemies
+        self.enemy_jump, self.enemy_support, self.enemy_inside = self.enemy_flags
+
+    def gather(self):
+        self.near = np.take(self.ring, self.next_level, 1, mode="wrap") * self.n + self.worlds
+        self.enemy_near = self.near + self.enemy_offsets * self.k * self.n
+        self.nearby = np.take(self.platforms.reshape(5, -1), self.near, 1)
+
+    def run(self, frames, policy=None):
+        for _ in range(frames):
+            if not self.live.any():
+                break
+            self.step(policy(self) if policy else self.edge_policy())
+        self.round_time[self.ids[self.live]] = self.frame * self.time
+        return self
+
+    def edge_policy(self):
+        left, right = self.nearby[0], self.nearby[1]
+        edge = self.px + PUSH_DIST + self.player_size[0]
+        air_time = 2 * PLAYER_JUMP_SPEED / GRAVITY - self.jump_phase
+        reach = ((air_time * PUSH_SPEED / (2 * PUSH_DIST)).astype(np.int64) - 1) * PUSH_DIST
+        return ~self.in_pushing & (
+            (edge <= right[1]) |
+            ((self.next_level < self.count) & (edge + reach > left[2] + LANDING_TOLERANCE) &
+             (edge < right[2])))
+
+    def die(self, mask, cause):
+        mask = mask & self.live
+        dead = self.ids[mask]
+        self.cause[dead] = cause
+        self.round_time[dead] = (self.frame + 1) * self.time
+        self.live &= ~mask
+
+    def compact(self):
+        keep = np.flatnonzero(self.live)
+        for name in self.fields:
+            setattr(self, name, np.ascontiguousarray(getattr(self, name)[..., keep]))
+        self.n = len(keep)
+        self.worlds = np.arange(self.n)
+        self.unpack()
+        self.gather()
+
+    def step(self, push):
+        time = self.time
+        pw, ph = self.player_size
+        self.world_frames += int(np.count_nonzero(self.live))
+
+        self.jump_phase += time
+        self.push_phase += time
+        self.cooldown -= time
+        push = push & self.live
+        np.copyto(self.push_phase, 0, where=push)
+        self.in_pushing |= push
+        np.copyto(self.move_x, self.px, where=push)
+
+        left, right, top = self.nearby[:3, 1]
+        feet_left, feet_right = self.player_feet
+        on = ((self.py > top) & (self.px + feet_left < right) & (self.px + feet_right > left))
+
+        moving = self.in_pushing & ~on
+        push_acc = -PUSH_SPEED ** 2 / (2 * PUSH_DIST)
+        np.copyto(self.px, self.move_x + PUSH_SPEED * self.push_phase +
+                  push_acc * self.push_phase ** 2 / 2, where=moving)
+        self.in_pushing &= ~(moving & (self.px - self.move_x >= PUSH_DIST - 1))
+
+        land = on & ((self.py - top <= LANDING_TOLERANCE) |
+                     ((left < self.px) & (self.px < right - pw)))
+        bounce = land & (self.cooldown <= 0)
+        self.is_jump &= ~land
+        self.is_jump |= bounce
+        np.copyto(self.jump_phase, 0, where=land)
+        np.copyto(self.move_y, top, where=land)
+        np.copyto(self.cooldown, self.player_cooldown, where=bounce)
+        side = on & ~land & (self.px + pw > right)
+        wall = on & ~land & ~side & (self.px < left)
+        self.px += 2 * side.view(np.int8) - 2 * wall.view(np.int8)
+        self.in_pushing &= ~wall
+        np.copyto(self.py, self.move_y - PLAYER_JUMP_SPEED * self.jump_phase +
+                  GRAVITY * self.jump_phase ** 2 / 2, where=self.is_jump)
+        np.copyto(self.camera, self.px - CAMERA_LIMIT, where=self.px > CAMERA_LIMIT)
+
+        left, right = self.nearby[:2, 2]
+        crossed = (self.next_level < self.count) & (left < self.px + pw) & self.live
+        self.level[self.ids] += crossed & (right > self.px)
+        self.next_level += crossed
+
+        if self.frame % BATCH_GENERATE_EVERY == 0:
+            self.generate()
+        self.gather()
+        self.update_enemies()
+        self.update_bombs()
+        self.die(self.py > HEIGHT + ph, 1)
+        self.frame += 1
+        if self.n > 64 and 4 * np.count_nonzero(self.live) < 3 * self.n:
+            self.compact()
+
+    def update_enemies(self):
+        pw, ph = self.player_size
+        ew, eh = self.enemy_size
+        ex, ey, top = self.ex, self.ey, self.top
+        now = (self.frame + 1) * self.time
+
+        land = self.enemy_support & (ey > top)
+        land &= self.enemy_inside | (ey <= top + LANDING_TOLERANCE)
+        bounce = land & (self.enemy_ready <= now)
+        self.enemy_jump &= ~land
+        self.enemy_jump |= bounce
+        np.copyto(self.enemy_launch, now, where=land)
+        np.copyto(self.enemy_move_y, top, where=land)
+        np.copyto(self.enemy_ready, now + self.enemy_cooldown, where=bounce)
+        phase, scratch = self.scratch
+        np.subtract(now, self.enemy_launch, out=phase)
+        np.multiply(phase, GRAVITY / 2, out=scratch)
+        scratch -= self.enemy_speed
+        scratch *= phase
+        scratch += self.enemy_move_y
+        scratch -= ey
+        scratch *= self.enemy_jump
+        ey += scratch
+
+        flat = self.enemy_near
+        near_x, near_y = np.take(self.enemies[:2].reshape(2, -1), flat, 1)
+        px, py = self.px, self.py
+        overlap = ((near_x < px + pw) & (near_x + ew > px) & (near_y - eh < py) & (near_y > py - ph))
+        stomped = None
+        touched = np.flatnonzero(overlap.any((0, 1)))
+        if len(touched):
+            flat, overlap = flat[..., touched], overlap[..., touched]
+            near_x, near_y = near_x[..., touched], near_y[..., touched]
+            px, py = px[touched], py[touched]
+            enemy_top = near_y - eh
+            under = (py - ph <= enemy_top) & (enemy_top < py)
+            stomped = (overlap & under & self.live[touched] &
+                       (((px <= near_x) & (near_x < px + pw)).view(np.int8) +
+                        ((px <= near_x + ew // 2) & (near_x + ew // 2 < px + pw)) +
+                        ((px <= near_x + ew) & (near_x + ew < px + pw)) == 2))
+            player_top = py - ph
+            over = (near_y - eh <= player_top) & (player_top < near_y)
+            hits = (((near_x <= px) & (px < near_x + ew)).view(np.int8) +
+                    ((near_x <= px + pw // 2) & (px + pw // 2 < near_x + ew)) +
+                    ((near_x <= px + pw) & (px + pw < near_x + ew)))
+            pushed = overlap & ~stomped
+            killed = np.zeros(self.n, bool)
+            killed[touched] = (pushed & over & (hits == 2)).any((0, 1))
+            self.die(killed, 2)
+            np.put(ex, flat[pushed], (near_x + (near_x - px) / 4)[pushed])
+            self.unsettled[touched[pushed.any((0, 1))]] = True
+
+        if MAX_ENEMIES_PER_PLATFORM > 1 and self.unsettled.any():
+            moved = np.flatnonzero(self.unsettled)
+            first, rest = ex[:1, :, moved], ex[1:, :, moved]
+            crowded = (rest < first + ew) & (rest + ew > first)
+            ex[1:, :, moved] = rest + 3 * crowded
+            self.settle(moved)
+            self.unsettled[moved] = crowded.any((0, 1))
+        if stomped is not None:
+            np.put(ex, flat[stomped], np.nan)
+        fallen = ey > HEIGHT + eh
+        if fallen.any():
+            ex[fallen], ey[fallen], self.enemy_jump[fallen] = np.nan, HEIGHT + eh, False
+
+    def settle(self, columns):
+        feet_left, feet_right = self.enemy_feet
+        ew = self.enemy_size[0]
+        ex, left, right = self.ex[..., columns], self.left[:, columns], self.right[:, columns]
+        self.enemy_support[..., columns] = (ex > left - feet_right) & (ex < right - feet_left)
+        self.enemy_inside[..., columns] = (ex > left) & (ex < right - ew)
+
+    def update_bombs(self):
+        pw, ph = self.player_size
+        ew, eh = self.enemy_size
+        bw, bh = self.bomb_size
+        px, py = self.px, self.py
+
+        _, _, top, bx, fuse = self.nearby[:, 1]
+        touch = ((fuse == -1) & (bx < px + pw) & (bx + bw > px) & (top - bh < py) & (top > py - ph))
+        if touch.any():
+            np.put(self.bomb_fuse, self.near[1][touch], self.fuse)
+        lit = self.bomb_fuse >= 0
+        if not lit.any():
+            return
+        np.subtract(self.bomb_fuse, self.time, out=self.bomb_fuse, where=lit)
+        boom = lit & (self.bomb_fuse < 0)
+        if not boom.any():
+            return
+
+        bx, by = self.bx + bw / 2, self.top - bh / 2
+        reach = (BOMB_RADIUS + np.hypot(pw, ph) / 2) ** 2
+        near = (bx - (px + pw / 2)) ** 2 + (by - (py - ph / 2)) ** 2 <= reach
+        self.die((boom & near).any(0), 3)
+
+        reach = (BOMB_RADIUS + np.hypot(ew, eh) / 2) ** 2
+        hit = np.flatnonzero(boom.any(0))
+        bx, by, boom_hit = bx[:, None, None, hit], by[:, None, None, hit], boom[:, None, None, hit]
+        ex, ey = self.ex[..., hit], self.ey[..., hit]
+        near = (bx - (ex + ew / 2)) ** 2 + (by - (ey - eh / 2)) ** 2 <= reach
+        self.ex[..., hit] = np.where((boom_hit & near).any(0), np.nan, ex)
+        self.bomb_fuse[boom] = -np.inf
+
+    def generate(self):
+        while True:
+            rows = np.flatnonzero(self.live & (self.right[(self.count - 1) % self.k, self.worlds] -
+                                               self.camera < 2 * WIDTH))
+            m, e = len(rows), MAX_ENEMIES_PER_PLATFORM
+            if not m:
+                return
+            ew, eh = self.enemy_size
+            bw, bh = self.bomb_size
+            rng = self.rng
+            last = self.right[(self.count[rows] - 1) % self.k, rows].astype(np.int64)
+            slot = self.count[rows] % self.k
+
+            new_x = last + rng.integers(*PLATFORM_GAP, m)
+            height = rng.integers(*PLATFORM_HEIGHT, m)
+            length = rng.integers(*PLATFORM_LENGTH, m)
+            self.left[slot, rows] = new_x
+            self.right[slot, rows] = new_x + length
+            self.top[slot, rows] = HEIGHT - height
+
+            spawned = np.arange(e)[:, None] < rng.integers(0, e + 1, m)
+            self.ex[:, slot, rows] = np.where(spawned, rng.integers(new_x, new_x + length - ew, (e, m)),
+                                              np.nan)
+            self.ey[:, slot, rows] = self.enemy_move_y[:, slot, rows] = HEIGHT - height - eh
+            self.enemy_speed[:, slot, rows] = rng.integers(*ENEMY_JUMP_SPEED, (e, m))
+            self.enemy_launch[:, slot, rows] = self.frame * self.time
+            self.enemy_ready[:, slot, rows] = 0
+            self.enemy_jump[:, slot, rows] = spawned
+
+            armed = rng.integers(0, 101, m) < BOMB_CHANCE
+            self.bx[slot, rows] = rng.integers(new_x, new_x + length - bw)
+            self.bomb_fuse[slot, rows] = np.where(armed, -1, -np.inf)
+            self.count[rows] += 1
+            self.unsettled[rows] = True
+            self.settle(rows)
+
+
+class JumperEnv:
+    instance = None
+
+    def __init__(self, observation="features", time=PHYSICS_STEP, frame_skip=1, downsample=4):
+        if np is None:
+            raise RuntimeError("JumperEnv requires numpy")
+        if JumperEnv.instance and JumperEnv.instance():
+            raise RuntimeError("Only one JumperEnv can exist per process")
+        JumperEnv.instance = weakref.ref(self)
+        global game
+        game = self.game = Game(screen)
+        self.observation = observation
+        self.time = time
+        self.frame_skip = frame_skip
+        self.downsample = downsample
+        if observation == "pixels":
+            self.surface = pygame.Surface((WIDTH // downsample, HEIGHT // downsample))
+            self.buffer = pygame.surfarray.pixels3d(self.surface)
+        else:
+            self.buffer = np.zeros(4 + 3 * ENV_PLATFORMS + 2 * (ENV_ENEMIES + ENV_BOMBS),
+                                   np.float32)
+
+    def reset(self, seed=None):
+        self.game.restart_game(seed)
+        return self.observe()
+
+    def close(self):
+        if JumperEnv.instance and JumperEnv.instance() is self:
+            JumperEnv.instance = None
+
+    def step(self, push):
+        player = self.game.player
+        level = player.level
+        for skip in range(self.frame_skip):
+            self.game.step(self.time, push and not skip)
+            if player.death:
+                break
+        return (self.observe(), player.level - level, player.death,
+                {"level": player.level, "frame": self.game.ticks})
+
+    def observe(self):
+        if self.observation == "pixels":
+            game, surface, scale = self.game, self.surface, self.downsample
+            surface.fill(ENV_COLORS[0])
+            for group, color in zip((game.platforms_group, game.bombs_group, game.player_group,
+                                     game.enemies_group), ENV_COLORS[1:]):
+                for sprite in group.visible(*game.view):
+                    x, y, w, h = sprite.rect
+                    surface.fill(color, (x // scale, y // scale, w // scale + 1, h // scale + 1))
+            return self.buffer
+
+        player = self.game.player
+        x, y = player.pos
+        buffer = self.buffer
+        buffer.fill(0)
+        buffer[:4] = (player.rect.top / HEIGHT, player.jump_phase,
+                      player.in_pushing, player.is_jump)
+        i = 4
+        platform = player.last_level or player.first_platform
+        for _ in range(ENV_PLATFORMS):
+            if not platform:
+                break
+            left, right = platform.world_span()
+            buffer[i:i + 3] = (left - x) / WIDTH, (right - x) / WIDTH, platform.rect.top / HEIGHT
+            platform = platform.next
+            i += 3
+        i = 4 + 3 * ENV_PLATFORMS
+        for group, count in (self.game.enemies_group, ENV_ENEMIES), (self.game.bombs_group, ENV_BOMBS):
+            near = sorted(((sprite.world_span()[0] - x, sprite.rect.bottom - y)
+                           for sprite in group.query(x - WIDTH / 2, x + WIDTH)
+                           if not sprite.death), key=lambda offset: abs(offset[0]))
+            for j, (dx, dy) in enumerate(near[:count]):
+                buffer[i + 2 * j:i + 2 * j + 2] = dx / WIDTH, dy / HEIGHT
+            i += 2 * count
+        return buffer
+
+
+def edge_policy(game):
+    player = game.player
+    if player.in_pushing:
+        return False
+    platform = player.last_level or player.first_platform
+    right = player.pos[0] + PUSH_DIST + player.rect.width
+    if right <= platform.world_span()[1]:
+        return True
+    if not platform.next:
+        return False
+    next_left, next_right = platform.next.world_span()
+    air_time = 2 * player.jump_speed / GRAVITY - player.jump_phase
+    reach = (int(air_time * PUSH_SPEED / (2 * PUSH_DIST)) - 1) * PUSH_DIST
+    return right + reach > next_left + LANDING_TOLERANCE and right < next_right
+
+
+def run_headless(frames, time, pushes=(), seed=None, frame_times=None, policy=None):
+    global game
+    game = Game(screen)
+    game.restart_game(seed)
+    game.simulate(frames, time, pushes, frame_times, policy)
+    return game
+
+
+def run_job(job):
+    kind, value = job
+    if kind == "replay":
+        seed, step, frames, pushes = load_replay(value)
+        policy = None
+    else:
+        seed, step, frames = value, HEADLESS_STEP, HEADLESS_FRAMES
+        pushes, policy = (), edge_policy
+    frame_times = []
+    run_headless(frames, step, pushes, seed, frame_times, policy)
+    frame_times.sort()
+    return {"job": value, "seed": game.seed, "level": game.player.level,
+            "round_time": game.round_time, "frames": len(frame_times),
+            "frame_mean": sum(frame_times) / max(len(frame_times), 1),
+            "frame_p99": frame_times[int(len(frame_times) * 0.99)] if frame_times else 0,
+            "frame_max": frame_times[-1] if frame_times else 0}
+
+
+def warm_cache():
+    for loader, args in assets.loaders.values():
+        if loader in (load_image, load_atlas):
+            loader(*args)
+
+
+def run_parallel(jobs, workers=None):
+    warm_cache()
+    context = multiprocessing.get_context("spawn")
+    headless = os.environ.get("JUMPER_HEADLESS")
+    os.environ["JUMPER_HEADLESS"] = "1"
+    try:
+        pool = ProcessPoolExecutor(workers, mp_context=context)
+        futures = [pool.submit(run_job, job) for job in jobs]
+    finally:
+        if headless is None:
+            del os.environ["JUMPER_HEADLESS"]
+        else:
+            os.environ["JUMPER_HEADLESS"] = headless
+    with pool:
+        for future in as_completed(futures):
+            yield future.result()
+
 
 if __name__ == '__main__':
+    if "--build-atlas" in sys.argv:
+        build_atlas()
+        sys.exit()
+
+    if HEADLESS and "--runner" in sys.argv:
+        if "--replays" in sys.argv:
+            folder = sys.argv[sys.argv.index("--replays") + 1]
+            jobs = [("replay", os.path.join(folder, name))
+                    for name in sorted(os.listdir(folder)) if name.endswith(".jrp")]
+        else:
+            seeds = int(sys.argv[sys.argv.index("--seeds") + 1]) if "--seeds" in sys.argv else 100
+            jobs = [("seed", seed) for seed in range(seeds)]
+        workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else None
+        started = perf_counter()
+        results = []
+        for result in run_parallel(jobs, workers):
+            results.append(result)
+            print(f"{result['job']}: сид {result['seed']}, уровень {result['level']}, "
+                  f"время раунда {result['round_time']:.1f} с, кадров {result['frames']}, "
+                  f"кадр {result['frame_mean'] * 1000:.3f} мс "
+                  f"(p99 {result['frame_p99'] * 1000:.3f}, макс {result['frame_max'] * 1000:.3f})",
+                  flush=True)
+        elapsed = perf_counter() - started
+        frames = sum(result["frames"] for result in results)
+        print(f"Прогонов: {len(results)}, средний уровень: "
+              f"{sum(result['level'] for result in results) / max(len(results), 1):.2f}, "
+              f"скорость: {frames / elapsed:.0f} кадров/с")
+        sys.exit()
+
+    if HEADLESS and "--batch" in sys.argv:
+        worlds = int(sys.argv[sys.argv.index("--batch") + 1])
+        run_headless(HEADLESS_FRAMES, HEADLESS_STEP, seed=0, policy=edge_policy)
+        serial_frames = seed = 0
+        started = perf_counter()
+        while perf_counter() - started < 1:
+            seed += 1
+            game.restart_game(seed)
+            serial_frames += game.simulate(HEADLESS_FRAMES, HEADLESS_STEP, policy=edge_policy)
+        serial = serial_frames / (perf_counter() - started)
+        started = perf_counter()
+        batch = BatchSimulation(worlds).run(HEADLESS_FRAMES)
+        speed = batch.world_frames / (perf_counter() - started)
+        causes = ", ".join(f"{name}: {int((batch.cause == code).sum())}"
+                           for code, name in enumerate(batch.causes))
+        print(f"Миров: {worlds}, средний уровень: {batch.level.mean():.2f}, "
+              f"максимальный: {batch.level.max()}, причины: {causes}, "
+              f"скорость: {speed:.0f} кадров/с, "
+              f"последовательно: {serial:.0f} кадров/с ({speed / serial:.0f}x)")
+        sys.exit()
+
+    if HEADLESS:
+        if "--replay" in sys.argv:
+            seed, step, frames, pushes = load_replay(sys.argv[sys.argv.index("--replay") + 1])
+            policy = None
+        else:
+            seed, step, frames = None, HEADLESS_STEP, HEADLESS_FRAMES
+            pushes, policy = (), edge_policy
+        started = perf_counter()
+        run_headless(frames, step, pushes, seed, policy=policy)
+        elapsed = perf_counter() - started
+        print(f"Сид: {game.seed}, кадров: {game.ticks}, уровень: {game.player.level}, "
+              f"время раунда: {game.round_time:.1f} с, "
+              f"скорость: {game.ticks / elapsed:.0f} кадров/с")
+        sys.exit()
+
+    records_store = RecordsStore("records.db", legacy="records.csv")
+    atexit.register(records_store.close)
+
     start_form = Start(screen)
     records_form = Records(screen)
     game = Game(screen)
     pause = Pause(screen)
     settings_form = Settings(screen)
+    window_time = perf_counter() - started
+
+    def show_startup_time():
+        print(f"Запуск: {window_time * 1000:.0f} мс, "
+              f"загрузка ресурсов: {(perf_counter() - started) * 1000:.0f} мс, "
+              f"кэш изображений: {cache_stats['hits']} попаданий, "
+              f"{cache_stats['misses']} промахов")
+
+    assets.load_async(*game_assets, done=show_startup_time if SHOW_STARTUP_TIME else None)
 
     running = True
     while running:
@@ -950,6 +2454,14 @@ if __name__ == '__main__':
         if start_form.is_visible:
             start_form.main(events, timer)
         if game.is_visible:
-            game.main(events, timer)
+            if CHECK_ALLOCATIONS:
+                with SurfaceCounter() as counter:
+                    game.main(events, timer)
+                if counter.count:
+                    print(f"Кадр создал поверхностей: {counter.count}")
+            else:
+                game.main(events, timer)
         if pause.is_visible:
             pause.main(events, timer)
+        music_player.update(timer.get_time() / 1000.0)
+        voices.update()
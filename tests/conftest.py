@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ["JUMPER_HEADLESS"] = "1"
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+import jumper
+
+
+@pytest.fixture
+def game():
+    jumper.game = jumper.Game(jumper.screen)
+    jumper.game.restart_game(1)
+    return jumper.game
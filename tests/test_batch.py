@@ -0,0 +1,23 @@
+import jumper
+
+
+def run(worlds, seed, compact=True):
+    batch = jumper.BatchSimulation(worlds, seed=seed)
+    if not compact:
+        batch.compact = lambda: None
+    return batch.run(2000)
+
+
+def test_seeded_batch_is_deterministic():
+    first, second = run(128, 5), run(128, 5)
+    assert (first.level == second.level).all()
+    assert (first.cause == second.cause).all()
+    assert first.level.max() > 1
+
+
+def test_compaction_keeps_results():
+    compacted, full = run(256, 7), run(256, 7, compact=False)
+    assert compacted.n < full.n == 256
+    assert (compacted.level == full.level).all()
+    assert (compacted.cause == full.cause).all()
+    assert (compacted.round_time == full.round_time).all()
@@ -0,0 +1,48 @@
+import pytest
+
+import jumper
+
+
+@pytest.fixture
+def env():
+    env = jumper.JumperEnv()
+    yield env
+    env.close()
+
+
+def test_step_reports_level_gain(env):
+    observation = env.reset(3)
+    assert observation.shape == env.buffer.shape
+    total = 0
+    for frame in range(3000):
+        observation, reward, done, info = env.step(jumper.edge_policy(env.game))
+        total += reward
+        if done:
+            break
+    assert total == info["level"] > 0
+
+
+def test_reset_is_deterministic(env):
+    first = env.reset(5).copy()
+    env.step(True)
+    assert (env.reset(5) == first).all()
+
+
+def test_second_env_is_rejected(env):
+    with pytest.raises(RuntimeError):
+        jumper.JumperEnv()
+    env.close()
+    jumper.JumperEnv().close()
+
+
+def test_pixel_observation_shape():
+    env = jumper.JumperEnv("pixels", downsample=4)
+    try:
+        observation = env.reset(3)
+        assert observation.shape == (jumper.WIDTH // 4, jumper.HEIGHT // 4, 3)
+        assert observation.dtype == "uint8"
+        observation, reward, done, info = env.step(True)
+        assert observation.shape == (jumper.WIDTH // 4, jumper.HEIGHT // 4, 3)
+        assert observation.any()
+    finally:
+        env.close()
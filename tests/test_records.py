@@ -0,0 +1,36 @@
+from datetime import datetime
+
+import jumper
+
+
+def test_top_orders_by_score_then_round_time(tmp_path):
+    path = str(tmp_path / "records.db")
+    store = jumper.RecordsStore(path)
+    store.add(datetime(2024, 1, 1, 10), 30, 5)
+    store.add(datetime(2024, 1, 2, 10), 20, 5)
+    store.add(datetime(2024, 1, 3, 10), 10, 2)
+    store.add(datetime(2024, 1, 4, 10), 40, 9)
+    store.close()
+
+    store = jumper.RecordsStore(path)
+    try:
+        assert store.top(3) == [("04.01.2024 10:00:00", 40, 9),
+                                ("02.01.2024 10:00:00", 20, 5),
+                                ("01.01.2024 10:00:00", 30, 5)]
+    finally:
+        store.close()
+
+
+def test_legacy_import_skips_malformed_rows(tmp_path):
+    legacy = tmp_path / "records.csv"
+    legacy.write_text("time,round_time,score\n"
+                      "01.02.2024 12:00:00,12.5,3\n"
+                      "broken\n"
+                      "02.02.2024 12:00:00,abc,4\n"
+                      "03.02.2024 12:00:00,7,8\n")
+    store = jumper.RecordsStore(str(tmp_path / "records.db"), legacy=str(legacy))
+    try:
+        assert store.top() == [("03.02.2024 12:00:00", 7, 8),
+                               ("01.02.2024 12:00:00", 12, 3)]
+    finally:
+        store.close()
@@ -0,0 +1,39 @@
+import pytest
+
+import jumper
+
+
+def test_replay_round_trip(tmp_path):
+    filename = str(tmp_path / "run.jrp")
+    pushes = [0, 1, 127, 128, 300, 16384, 16385, 2 ** 21 + 5]
+    jumper.save_replay(filename, 2 ** 40 + 7, jumper.PHYSICS_STEP, 2 ** 22, pushes)
+    assert jumper.load_replay(filename) == (2 ** 40 + 7, jumper.PHYSICS_STEP, 2 ** 22, pushes)
+
+
+def test_replay_rejects_other_files(tmp_path):
+    filename = tmp_path / "run.jrp"
+    filename.write_bytes(b"\0" * jumper.REPLAY_HEADER.size)
+    with pytest.raises(ValueError):
+        jumper.load_replay(str(filename))
+
+
+def run(game, seed, pushes):
+    game.restart_game(seed)
+    frames = game.simulate(3000, jumper.PHYSICS_STEP, pushes)
+    return frames, game.ticks, game.player.level, game.player.pos, game.pushes
+
+
+def test_same_seed_and_pushes_reproduce_the_run(game):
+    pushes = range(0, 3000, 30)
+    first = run(game, 7, pushes)
+    assert run(game, 7, pushes) == first
+
+
+def test_recorded_replay_reproduces_the_run(game, tmp_path):
+    filename = str(tmp_path / "run.jrp")
+    frames, ticks, level, pos, pushes = run(game, 11, range(0, 3000, 25))
+    jumper.save_replay(filename, game.seed, jumper.PHYSICS_STEP, ticks, pushes)
+    seed, time, replay_frames, replay_pushes = jumper.load_replay(filename)
+    game.restart_game(seed)
+    game.simulate(replay_frames, time, replay_pushes)
+    assert (game.ticks, game.player.level, game.player.pos) == (ticks, level, pos)
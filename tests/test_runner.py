@@ -0,0 +1,30 @@
+import os
+
+import jumper
+
+
+def test_default_policy_depends_on_seed():
+    results = [jumper.run_job(("seed", seed)) for seed in range(4)]
+    assert len({(result["frames"], result["level"]) for result in results}) > 1
+    assert max(result["level"] for result in results) > 1
+
+
+def test_edge_policy_runs_are_reproducible(game):
+    game.simulate(jumper.HEADLESS_FRAMES, jumper.PHYSICS_STEP, policy=jumper.edge_policy)
+    ticks, level, pushes = game.ticks, game.player.level, game.pushes
+    game.restart_game(1)
+    game.simulate(jumper.HEADLESS_FRAMES, jumper.PHYSICS_STEP, pushes)
+    assert (game.ticks, game.player.level) == (ticks, level)
+
+
+def test_parallel_runner_with_empty_cache(tmp_path, monkeypatch):
+    os.symlink(os.path.join(os.getcwd(), "data"), tmp_path / "data")
+    monkeypatch.chdir(tmp_path)
+    results = sorted(jumper.run_parallel([("seed", seed) for seed in range(2)], 2),
+                     key=lambda result: result["job"])
+    assert [result["job"] for result in results] == [0, 1]
+    assert [result["level"] for result in results] == [
+        jumper.run_job(("seed", seed))["level"] for seed in range(2)]
+    cached = os.listdir(tmp_path / jumper.CACHE_DIR)
+    assert jumper.ATLAS_INDEX in cached
+    assert not [name for name in cached if name.endswith(".tmp")]
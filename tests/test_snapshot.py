@@ -0,0 +1,27 @@
+import jumper
+
+
+def trace(game, frames, pushes):
+    states = []
+    for frame in range(frames):
+        game.step(jumper.PHYSICS_STEP, frame in pushes)
+        states.append((game.ticks, tuple(game.player.pos), game.player.level,
+                       game.player.death, len(game.all_sprites)))
+    return states
+
+
+def test_restore_replays_the_same_steps(game):
+    pushes = set(range(0, 600, 20))
+    trace(game, 200, pushes)
+    snapshot = game.snapshot()
+    first = trace(game, 600, pushes)
+    game.restore(snapshot)
+    assert trace(game, 600, pushes) == first
+
+
+def test_restore_can_be_repeated(game):
+    snapshot = game.snapshot()
+    first = trace(game, 300, {0, 40, 90})
+    for _ in range(3):
+        game.restore(snapshot)
+        assert trace(game, 300, {0, 40, 90}) == first
@@ -0,0 +1,43 @@
+import pygame
+
+import jumper
+
+
+def frame(game):
+    game.step(jumper.PHYSICS_STEP, game.ticks % 30 == 0)
+    game.level_text.set(game.player.level)
+    game.time_text.set(int(game.round_time))
+    game.draw()
+
+
+def test_counter_sees_c_level_surfaces():
+    keep = []
+    with jumper.SurfaceCounter() as counter:
+        surface = pygame.Surface((4, 4))
+        assert isinstance(surface, pygame.Surface)
+        keep.append(surface.copy())
+        keep.append(surface.subsurface((0, 0, 2, 2)))
+        keep.append(jumper.get_font(None, 20).render("1", 1, "white"))
+    assert isinstance(surface, pygame.Surface)
+    assert counter.count == 4
+
+
+def test_steady_state_frame_allocates_nothing(game):
+    for text in game.level_text, game.time_text:
+        for char in "0123456789":
+            text.glyph(char)
+    for _ in range(120):
+        frame(game)
+    for _ in range(60):
+        with jumper.SurfaceCounter() as counter:
+            frame(game)
+        assert counter.count == 0
+
+
+def test_platform_spawn_allocates_nothing(game):
+    jumper.platform_sheet(jumper.PLATFORM_LENGTH[1], jumper.PLATFORM_HEIGHT[1])
+    with jumper.SurfaceCounter() as counter:
+        for length in range(*jumper.PLATFORM_LENGTH, 7):
+            for height in range(*jumper.PLATFORM_HEIGHT, 11):
+                game.spawn(jumper.Platform, game.width, height, length).destruct()
+    assert counter.count == 0